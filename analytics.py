@@ -0,0 +1,230 @@
+# analytics.py
+# Market-wide summaries of the listings dataset, computed once per dataset version
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from startup import LazyResource
+
+logger = logging.getLogger(__name__)
+
+# Numeric columns summarized in the dataset profile
+PROFILE_COLUMNS = ['make_year', 'mileage_kmpl', 'engine_cc', 'owner_count', 'accidents_reported', 'price_usd']
+PROFILE_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+class ColumnProfile:
+    def __init__(self, values):
+        # Sorted copy backs O(log n) percentile lookups by binary search
+        self.sorted = np.sort(np.asarray(values, dtype='float64'))
+        self.count = len(self.sorted)
+        self.min = float(self.sorted[0]) if self.count else float('nan')
+        self.max = float(self.sorted[-1]) if self.count else float('nan')
+        self.mean = float(self.sorted.mean()) if self.count else float('nan')
+        self.quantiles = dict(zip(PROFILE_QUANTILES, np.quantile(self.sorted, PROFILE_QUANTILES).tolist())) if self.count else {}
+
+    def percentile_rank(self, value):
+        # Share of listings below `value`, counting ties as half (0-100)
+        if not self.count:
+            return 50.0
+        below = np.searchsorted(self.sorted, value, side='left')
+        at_or_below = np.searchsorted(self.sorted, value, side='right')
+        return float((below + at_or_below) / 2 / self.count * 100)
+
+    def rank_table(self, max_points=101):
+        """Compact form of the column for percentile ranks in the browser.
+
+        Points x with the percent of listings below and at-or-below each.
+        A column with at most `max_points` distinct values is listed in full
+        and ranks exactly; otherwise the points are evenly spaced quantiles
+        and ranks in between are interpolated (within 100 / max_points).
+        """
+        if not self.count:
+            return {'x': [], 'below': [], 'at_or_below': []}
+        x = np.unique(self.sorted)
+        if len(x) > max_points:
+            x = np.unique(self.sorted[np.linspace(0, self.count - 1, max_points).round().astype(int)])
+        below = np.searchsorted(self.sorted, x, side='left') / self.count * 100
+        at_or_below = np.searchsorted(self.sorted, x, side='right') / self.count * 100
+        return {
+            'x': x.tolist(),
+            'below': np.round(below, 3).tolist(),
+            'at_or_below': np.round(at_or_below, 3).tolist()
+        }
+
+
+class DatasetProfile:
+    """Per-column statistics and the brand share table, computed in one pass."""
+
+    def __init__(self, columns, brand_share):
+        self.columns = columns
+        self.brand_share = brand_share
+
+    @classmethod
+    def from_frame(cls, df):
+        columns = {col: ColumnProfile(df[col].to_numpy()) for col in PROFILE_COLUMNS if col in df}
+        brand_share = (df['brand'].value_counts(normalize=True) * 100).to_dict()
+        return cls(columns, brand_share)
+
+    def __getitem__(self, col):
+        return self.columns[col]
+
+    def client_payload(self, columns):
+        # What the browser needs to score a listing against the market
+        # (see assets/clientside.js): rank tables and the rank of each mean
+        return {
+            'columns': {col: self.columns[col].rank_table() for col in columns},
+            'market_rank': {col: round(self.columns[col].percentile_rank(self.columns[col].mean), 3) for col in columns},
+            'brand_share': {brand: round(share, 3) for brand, share in self.brand_share.items()}
+        }
+
+
+class MarketAggregates:
+    """Precomputed tables behind the market analytics charts."""
+
+    def __init__(self, brand_avg_prices, brand_counts, year_avg_prices, profile, version=None):
+        self.brand_avg_prices = brand_avg_prices
+        self.brand_counts = brand_counts
+        self.year_avg_prices = year_avg_prices
+        self.profile = profile
+        self.version = version
+
+    @classmethod
+    def from_frame(cls, df, version=None):
+        # Average price by brand, most expensive first
+        brand_avg_prices = df.groupby('brand', observed=True)['price_usd'].mean().reset_index()
+        brand_avg_prices = brand_avg_prices.sort_values('price_usd', ascending=False)
+
+        # Brand popularity based on count of listings
+        brand_counts = df['brand'].value_counts().reset_index()
+        brand_counts.columns = ['brand', 'count']
+
+        # Average price by year and depreciation relative to newest cars
+        year_avg_prices = df.groupby('make_year')['price_usd'].mean().reset_index()
+        year_avg_prices = year_avg_prices.sort_values('make_year')
+        if not year_avg_prices.empty:
+            max_price = year_avg_prices['price_usd'].max()
+            year_avg_prices['value_retention'] = (year_avg_prices['price_usd'] / max_price) * 100
+        else:
+            # Fallback if no data
+            year_avg_prices = pd.DataFrame({
+                'make_year': list(range(2015, 2025)),
+                'value_retention': [27, 30, 34, 39, 45, 52, 61, 72, 85, 100]
+            })
+
+        return cls(brand_avg_prices, brand_counts, year_avg_prices, DatasetProfile.from_frame(df), version)
+
+
+class AggregateStore:
+    """Holds the dataset and its aggregates, rebuilding both when the CSV changes.
+
+    The file is stat'ed at most every `check_interval` seconds, so reads are
+    a lock-free attribute lookup in the common case. A changed file is
+    loaded in a background thread and the new frame and aggregates are
+    swapped in together once both are built; a file that fails to load is
+    logged and the current data keeps serving. With `lazy=True` the first
+    load runs in the background and `get()` waits for it. `on_rebuild`
+    callbacks run in the reload thread after each swap with the new
+    MarketAggregates.
+    """
+
+    def __init__(self, csv_path, df=None, loader=pd.read_csv, check_interval=5.0, lazy=False):
+        self.csv_path = csv_path
+        self.loader = loader
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self.df = None
+        self.aggregates = None
+        self._stamp = None
+        self._loading = None  # pid of the process running a reload
+        self._next_check = time.monotonic() + check_interval
+        self._listeners = []
+        self.rebuilds = 0
+        self.failed_loads = 0
+        self.last_error = None
+        self._initial = LazyResource('dataset', lambda: self._install(*self._build(df)), lazy=lazy)
+
+    def _build(self, df=None):
+        # (frame, aggregates, stamp) for the file as it is now; nothing is installed
+        stamp = self._stat()
+        df = df if df is not None else self.loader(self.csv_path)
+        return df, MarketAggregates.from_frame(df, version=stamp), stamp
+
+    def _install(self, df, aggregates, stamp):
+        with self._lock:
+            self.df, self.aggregates, self._stamp = df, aggregates, stamp
+
+    @property
+    def ready(self):
+        return self._initial.ready
+
+    @property
+    def error(self):
+        return self._initial.error
+
+    def _stat(self):
+        try:
+            st = os.stat(self.csv_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _reload(self, stamp):
+        try:
+            df, aggregates, built_stamp = self._build()
+            self._install(df, aggregates, built_stamp)
+        except Exception as e:
+            logger.exception("reloading %s failed; keeping the current data", self.csv_path)
+            self.failed_loads += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            # Don't retry the same file until it changes again
+            with self._lock:
+                self._stamp = stamp
+            return
+        finally:
+            self._loading = None
+        self.rebuilds += 1
+        logger.info("dataset reloaded from %s", self.csv_path)
+        for listener in self._listeners:
+            try:
+                listener(aggregates)
+            except Exception:
+                logger.exception("on_rebuild listener %r failed", listener)
+
+    def check(self):
+        """Start reloading the dataset if the CSV changed; returns True if a reload started."""
+        stamp = self._stat()
+        with self._lock:
+            # A reload thread started before a fork doesn't exist in the child
+            if stamp is None or stamp == self._stamp or self._loading == os.getpid():
+                return False
+            self._loading = os.getpid()
+        threading.Thread(target=self._reload, args=(stamp,), name='dataset-reload', daemon=True).start()
+        return True
+
+    def get(self):
+        self._initial.get()
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self.check()
+        return self.aggregates
+
+    def on_rebuild(self, listener):
+        self._listeners.append(listener)
+
+    def stats(self):
+        aggregates = self.aggregates
+        return {
+            'path': self.csv_path,
+            'rows': len(self.df) if self.df is not None else None,
+            'version': list(aggregates.version) if aggregates is not None and aggregates.version else None,
+            'rebuilds': self.rebuilds,
+            'reloading': self._loading == os.getpid(),
+            'failed_loads': self.failed_loads,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,278 @@
+# api.py
+# REST endpoints served by the Flask server behind the Dash app
+import io
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from flask import Blueprint, Response, current_app, g, jsonify, request, send_from_directory, stream_with_context
+
+from delivery import strip_etag_suffix
+from schema import INPUT_SCHEMA
+
+batch_api = Blueprint('batch_api', __name__, url_prefix='/api')
+health_api = Blueprint('health_api', __name__)
+metrics_api = Blueprint('metrics_api', __name__)
+
+# Upper bound on listings accepted in one request
+MAX_BATCH_ROWS = 50000
+
+# Request body limit per allowed row (a dataset CSV row is ~90 bytes, a JSON
+# record ~250), so an oversized upload is refused before it is read
+MAX_BYTES_PER_ROW = 512
+
+# Rows serialized per chunk when streaming results back
+STREAM_CHUNK_ROWS = 1000
+
+# Retry-After for requests that arrive while LAZY_STARTUP is still loading
+LOADING_RETRY_SECONDS = 2
+
+
+def register_batch_api(server, batch_scorer):
+    server.config['BATCH_SCORER'] = batch_scorer
+    server.config.setdefault('MAX_BATCH_ROWS', MAX_BATCH_ROWS)
+    # Flask's default is None (unlimited), so setdefault() wouldn't apply
+    if server.config.get('MAX_CONTENT_LENGTH') is None:
+        server.config['MAX_CONTENT_LENGTH'] = server.config['MAX_BATCH_ROWS'] * MAX_BYTES_PER_ROW
+    server.register_blueprint(batch_api)
+
+
+def register_stats(server, name, provider):
+    # Expose a component's stats dict under /api/stats
+    server.config.setdefault('STATS_PROVIDERS', {})[name] = provider
+
+
+def register_health(server, resources, startup_timer):
+    # resources: name -> object with a `ready` flag (and `error` once failed)
+    server.config['STARTUP_RESOURCES'] = resources
+    server.config['STARTUP_TIMER'] = startup_timer
+    server.register_blueprint(health_api)
+
+
+def register_figures(server, figure_cache):
+    server.config['FIGURE_CACHE'] = figure_cache
+
+
+def register_metrics(server, metrics):
+    # GET /metrics; the request hooks are only installed when metrics are enabled
+    server.config['METRICS'] = metrics
+    server.register_blueprint(metrics_api)
+    if metrics.enabled:
+        server.before_request(start_callback_timer)
+        server.after_request(record_callback_time)
+
+
+def register_profiler(server, profiler):
+    # Per-request profiling (see profiling.py); nothing is installed when it's off
+    if not profiler.enabled:
+        return
+    server.config['PROFILER'] = profiler
+    server.before_request(start_profile)
+    server.after_request(finish_profile)
+
+
+def register_delivery(server, compressor, fingerprints):
+    # Registered last so compression runs before the other after_request hooks
+    # (Flask calls them in reverse), and profiles and timings include it
+    server.config['COMPRESSOR'] = compressor
+    server.config['ASSET_FINGERPRINTS'] = fingerprints
+    server.before_request(strip_encoded_etags)
+    server.after_request(compress_response)
+
+
+def register_layout(server, cached_layout):
+    # Serve /_dash-layout from the cached serialization (with an ETag)
+    server.config['CACHED_LAYOUT'] = cached_layout
+    cached_layout.view = server.view_functions[cached_layout.endpoint]
+    server.view_functions[cached_layout.endpoint] = serve_layout
+
+
+def serve_layout():
+    return current_app.config['CACHED_LAYOUT'].response(request, Response)
+
+
+def strip_encoded_etags():
+    strip_etag_suffix(request.environ)
+
+
+def compress_response(response):
+    config = current_app.config
+    response = config['ASSET_FINGERPRINTS'].cache_headers(request, response)
+    return config['COMPRESSOR'].process(request, response)
+
+
+def start_profile():
+    mode = current_app.config['PROFILER'].requested_mode(request)
+    if mode is not None:
+        g.profile_session = current_app.config['PROFILER'].start(mode)
+
+
+def finish_profile(response):
+    # Runs after Dash has serialized the callback output, so JSON encoding is included
+    session = g.pop('profile_session', None)
+    if session is not None:
+        session.stop()
+        label = g.get('metrics_callback') or request.path
+        response.headers['X-Profile-Id'] = current_app.config['PROFILER'].save(session, label)
+    return response
+
+
+def start_callback_timer():
+    if request.path.endswith('/_dash-update-component'):
+        g.metrics_request_start = time.perf_counter()
+
+
+def record_callback_time(response):
+    # Whatever Dash does after the callback returns (mostly JSON serialization
+    # of its output) is the callback's serialization stage
+    if 'metrics_callback' in g and 'metrics_request_start' in g:
+        now = time.perf_counter()
+        metrics = current_app.config['METRICS']
+        if 'metrics_callback_done' in g:
+            metrics.observe(g.metrics_callback, 'serialization', now - g.metrics_callback_done)
+        metrics.observe(g.metrics_callback, 'request', now - g.metrics_request_start)
+    return response
+
+
+def still_loading(name):
+    # 503 instead of holding the worker until a lazily loaded resource is ready
+    return jsonify(error=f"The {name} is still loading"), 503, {'Retry-After': str(LOADING_RETRY_SECONDS)}
+
+
+def read_batch(req):
+    # Accept either a CSV upload (same columns as the dataset) or JSON records
+    if req.mimetype in ('text/csv', 'application/csv'):
+        return pd.read_csv(io.BytesIO(req.get_data())), 'csv'
+
+    payload = req.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('listings')
+    if not isinstance(payload, list) or not all(isinstance(r, dict) for r in payload):
+        raise ValueError("Expected a JSON list of listings or {'listings': [...]}")
+    return pd.DataFrame.from_records(payload), 'json'
+
+
+def iter_json(results, model_version):
+    yield '{"model_version": %s, "count": %d, "predictions": [' % (json.dumps(model_version), len(results))
+    for start in range(0, len(results), STREAM_CHUNK_ROWS):
+        chunk = results[start:start + STREAM_CHUNK_ROWS]
+        body = ', '.join(json.dumps(row) for row in chunk)
+        yield (', ' if start else '') + body
+    yield ']}'
+
+
+def iter_csv(df):
+    for start in range(0, len(df), STREAM_CHUNK_ROWS):
+        chunk = df.iloc[start:start + STREAM_CHUNK_ROWS]
+        yield chunk.to_csv(index=False, header=(start == 0))
+
+
+@batch_api.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    scorer = current_app.config['BATCH_SCORER']
+    if not scorer.registry.ready:
+        return still_loading('model')
+
+    try:
+        df, fmt = read_batch(request)
+    except (ValueError, pd.errors.ParserError) as e:
+        return jsonify(error=str(e)), 400
+
+    if len(df) > current_app.config['MAX_BATCH_ROWS']:
+        return jsonify(error=f"Batch too large (max {current_app.config['MAX_BATCH_ROWS']} rows)"), 413
+
+    try:
+        # Same schema as the Dash form; missing service history is left to the imputer
+        input_data, errors = INPUT_SCHEMA.validate_frame(df)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    # One vectorized call over every valid row in the batch, pinned to the
+    # model version current when the request started
+    model = scorer.current_model()
+    prices = np.full(len(df), np.nan)
+    if len(input_data):
+        prices[pd.isnull(errors)] = scorer.predict(input_data, model)
+
+    headers = {'X-Model-Version': model.version}
+    if fmt == 'csv':
+        df = df.assign(predicted_price=np.round(prices, 2), error=errors)
+        return Response(stream_with_context(iter_csv(df)), mimetype='text/csv', headers=headers)
+
+    results = [
+        {'row': i, 'error': err} if err is not None else {'row': i, 'predicted_price': round(float(price), 2)}
+        for i, (price, err) in enumerate(zip(prices, errors))
+    ]
+    return Response(stream_with_context(iter_json(results, model.version)), mimetype='application/json', headers=headers)
+
+
+@batch_api.errorhandler(413)
+def batch_too_large(e):
+    limit = current_app.config['MAX_CONTENT_LENGTH']
+    return jsonify(error=f"Request body too large (max {limit // 1024 ** 2} MB)"), 413
+
+
+@batch_api.route('/stats', methods=['GET'])
+def stats():
+    providers = current_app.config.get('STATS_PROVIDERS', {})
+    return jsonify({name: provider() for name, provider in providers.items()})
+
+
+@batch_api.route('/figures/<name>', methods=['GET'])
+def figure(name):
+    figure_cache = current_app.config['FIGURE_CACHE']
+    if name not in figure_cache.names():
+        return jsonify(error=f"Unknown figure: {name}"), 404
+    if not figure_cache.store.ready:
+        return still_loading('dataset')
+
+    cached = figure_cache.get(name)
+    response = Response(cached.json, mimetype='application/json')
+    response.set_etag(cached.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
+
+
+@metrics_api.route('/metrics', methods=['GET'])
+def metrics_text():
+    return Response(current_app.config['METRICS'].render(), mimetype='text/plain; version=0.0.4')
+
+
+@batch_api.route('/profiles', methods=['GET'])
+def list_profiles():
+    profiler = current_app.config.get('PROFILER')
+    if profiler is None or not profiler.authorized(request):
+        return jsonify(error='Not found'), 404
+    return jsonify(profiles=profiler.names(), captured=profiler.captured)
+
+
+@batch_api.route('/profiles/<name>', methods=['GET'])
+def download_profile(name):
+    profiler = current_app.config.get('PROFILER')
+    if profiler is None or not profiler.authorized(request) or name not in profiler.names():
+        return jsonify(error='Not found'), 404
+    return send_from_directory(profiler.directory, name, as_attachment=True)
+
+
+@health_api.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify(status='ok')
+
+
+@health_api.route('/readyz', methods=['GET'])
+def readyz():
+    resources = current_app.config.get('STARTUP_RESOURCES', {})
+    status = {
+        name: 'ready' if r.ready else ('failed' if getattr(r, 'error', None) else 'loading')
+        for name, r in resources.items()
+    }
+    ready = all(s == 'ready' for s in status.values())
+    return jsonify(ready=ready, resources=status), (200 if ready else 503)
+
+
+@batch_api.route('/startup', methods=['GET'])
+def startup_report():
+    return jsonify(current_app.config['STARTUP_TIMER'].report())
@@ -0,0 +1,101 @@
+/* assets/clientside.js
+   Clientside callbacks (loaded automatically by Dash): everything on the
+   estimate that depends only on the form inputs is computed here, so a
+   click only waits on the server for the model's price. The dataset
+   profile comes from the market-profile store (see
+   DatasetProfile.client_payload in analytics.py). */
+
+(function () {
+    var RADAR_CATEGORIES = ['Age Factor', 'Mileage Efficiency', 'Engine Power', 'Brand Popularity'];
+
+    // Same mid-rank as ColumnProfile.percentile_rank: percent of listings
+    // below the value, counting ties as half (interpolated between points)
+    function percentileRank(table, value) {
+        var x = table.x, n = x.length;
+        if (!n) { return 50; }
+        if (value < x[0]) { return table.below[0]; }
+        if (value > x[n - 1]) { return table.at_or_below[n - 1]; }
+        var lo = 0, hi = n - 1;
+        while (lo < hi) {  // last point <= value
+            var mid = (lo + hi + 1) >> 1;
+            if (x[mid] <= value) { lo = mid; } else { hi = mid - 1; }
+        }
+        if (x[lo] === value) { return (table.below[lo] + table.at_or_below[lo]) / 2; }
+        var t = (value - x[lo]) / (x[lo + 1] - x[lo]);
+        return table.at_or_below[lo] + t * (table.below[lo + 1] - table.at_or_below[lo]);
+    }
+
+    function radarLayout(profile, title, polar) {
+        var layout = {
+            template: profile.template,
+            title: {text: title, font: {size: 18}, x: 0.5},
+            plot_bgcolor: 'rgba(0,0,0,0)',
+            paper_bgcolor: 'rgba(0,0,0,0)',
+            font: {size: 12, color: '#1E1E1E'}
+        };
+        if (polar) { layout.polar = {radialaxis: {visible: true, range: [0, 100]}}; }
+        return layout;
+    }
+
+    // Radar chart of the user's vehicle against market averages
+    function radarFigure(profile, make_year, mileage_kmpl, engine_cc, brand) {
+        if ([make_year, mileage_kmpl, engine_cc, brand].some(function (v) { return v === null || v === undefined; })) {
+            return {data: [], layout: radarLayout(profile, 'Vehicle Analysis (Enter details and predict to see analysis)', false)};
+        }
+        var selected = profile.brands.indexOf(brand) >= 0 ? brand : 'Unknown';
+        var share = profile.brand_share[selected];
+        var columns = profile.columns, market = profile.market_rank;
+        var user = [
+            percentileRank(columns.make_year, make_year),
+            percentileRank(columns.mileage_kmpl, mileage_kmpl),
+            percentileRank(columns.engine_cc, engine_cc),
+            share === undefined ? 10 : share
+        ];
+        var average = [market.make_year, market.mileage_kmpl, market.engine_cc, 50];
+        return {
+            data: [
+                {type: 'scatterpolar', r: user, theta: RADAR_CATEGORIES, fill: 'toself',
+                 name: 'Your Vehicle', line: {color: '#00B8A9'}},
+                {type: 'scatterpolar', r: average, theta: RADAR_CATEGORIES, fill: 'toself',
+                 name: 'Market Average', line: {color: '#007BFF'}}
+            ],
+            layout: radarLayout(profile, 'Your ' + selected + ' vs Market Average', true)
+        };
+    }
+
+    function listItem(text) {
+        return {type: 'Li', namespace: 'dash_html_components', props: {children: text}};
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        insights: {
+            percentileRank: percentileRank,
+
+            // Age factor, condition score, key factors and the radar chart
+            inputInsights: function (n_clicks, make_year, mileage_kmpl, engine_cc, owner_count,
+                                     accidents_reported, brand, insurance_valid, profile) {
+                var no_update = window.dash_clientside.no_update;
+                if (!n_clicks) {
+                    return [no_update, no_update, no_update, no_update];
+                }
+                var figure = profile ? radarFigure(profile, make_year, mileage_kmpl, engine_cc, brand) : no_update;
+                if ([make_year, owner_count, accidents_reported].some(function (v) { return v === null || v === undefined; })) {
+                    // The estimate shows the input errors; the tiles stay hidden
+                    return [no_update, no_update, no_update, figure];
+                }
+                var age = new Date().getFullYear() - make_year;
+                return [
+                    age + ' years old',
+                    Math.max(1, 10 - accidents_reported - owner_count * 2) + '/10',
+                    [
+                        listItem('Vehicle age: ' + age + ' years'),
+                        listItem('Ownership history: ' + owner_count + ' previous owner(s)'),
+                        listItem('Accident history: ' + accidents_reported + ' reported incident(s)'),
+                        listItem('Insurance status: ' + (insurance_valid === 'Yes' ? 'Valid' : 'Expired'))
+                    ],
+                    figure
+                ];
+            }
+        }
+    });
+})();
@@ -0,0 +1,141 @@
+# batching.py
+# Coalesces concurrent single-row predictions into one model call
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+
+class MicroBatcher:
+    """Queue single listings and score them together.
+
+    A background thread flushes the queue once it holds `max_batch_size`
+    rows or the oldest row has waited `max_wait_ms`, makes one
+    `predict_records` call over the batch and hands each caller its own
+    price. The queue is only held open while other requests that may still
+    join are in flight (see `in_flight`); a caller with no company is
+    scored inline on its own thread, as is every caller with
+    `max_batch_size=1`.
+    """
+
+    def __init__(self, predict_records, max_batch_size=32, max_wait_ms=5):
+        # predict_records: list of listing dicts -> array of prices
+        self.predict_records = predict_records
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._cond = threading.Condition()
+        self._pending = []  # (enqueued_at, record, future)
+        self._thread = None
+        self._pid = None
+        self._active = 0  # requests inside in_flight()
+
+        # Stats for tuning throughput vs tail latency
+        self._batch_sizes = Counter()
+        self._rows = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @classmethod
+    def from_env(cls, predict_records):
+        # A sync gunicorn worker serves one request at a time, so a batch could
+        # never fill there: batch only when the workers are threaded
+        threaded = int(os.environ.get('GUNICORN_THREADS', 1)) > 1
+        return cls(
+            predict_records,
+            max_batch_size=os.environ.get('PREDICT_MAX_BATCH_SIZE', 32 if threaded else 1),
+            max_wait_ms=os.environ.get('PREDICT_MAX_WAIT_MS', 5)
+        )
+
+    @contextmanager
+    def in_flight(self):
+        # Wrap each request that may call predict(); the queue waits for
+        # up to this many rows before the deadline
+        with self._cond:
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify()
+
+    def predict(self, record):
+        # Price one listing (a dict of the eleven model inputs)
+        with self._cond:
+            alone = self._active <= 1 and not self._pending
+        if self.max_batch_size == 1 or alone:
+            self._record_batch([0.0])
+            return float(self.predict_records([record])[0])
+        return self.submit(record).result()
+
+    def submit(self, record):
+        future = Future()
+        with self._cond:
+            self._ensure_worker()
+            self._pending.append((time.perf_counter(), record, future))
+            self._cond.notify()
+        return future
+
+    def _ensure_worker(self):
+        # Threads don't survive fork, so gunicorn workers each start their own
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='predict-batcher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._pending[0][0] + self.max_wait
+                # Wait only for rows that can still arrive: one per request in flight
+                while len(self._pending) < min(self.max_batch_size, self._active):
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+            self._flush(batch)
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        self._record_batch([started - enqueued for enqueued, _, _ in batch])
+        try:
+            prices = self.predict_records([record for _, record, _ in batch])
+        except Exception:
+            # Score rows one by one so a single bad input only fails its own caller
+            for _, record, future in batch:
+                try:
+                    future.set_result(float(self.predict_records([record])[0]))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        for (_, _, future), price in zip(batch, prices):
+            future.set_result(float(price))
+
+    def _record_batch(self, waits):
+        with self._cond:
+            self._batch_sizes[len(waits)] += 1
+            self._rows += len(waits)
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+
+    def stats(self):
+        with self._cond:
+            batches = sum(self._batch_sizes.values())
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': batches,
+                'rows': self._rows,
+                'mean_batch_size': self._rows / batches if batches else 0.0,
+                'batch_size_histogram': {str(size): n for size, n in sorted(self._batch_sizes.items())},
+                'mean_queue_wait_ms': self._wait_total / self._rows * 1000 if self._rows else 0.0,
+                'max_queue_wait_ms': self._wait_max * 1000,
+                'queued': len(self._pending)
+            }
@@ -0,0 +1,91 @@
+# benchmarks/bench_execution.py
+# Batch scoring throughput across process x thread combinations on the bundled
+# dataset (replicated to --rows), including the oversubscribed layouts that
+# unbounded XGBoost/BLAS threads produce under several server workers.
+#
+#   python benchmarks/bench_execution.py [--rows 200000] [--repeat 3]
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+warnings.filterwarnings('ignore')
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from execution import ExecutionPolicy, _init_pool_worker, _predict_chunk, available_cpus, split_rows
+from utils import FEATURE_COLUMNS
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+MODEL_PATH = os.path.join(ROOT, 'car_price_model_pipeline.pkl')
+
+
+def powers_of_two(limit):
+    values = [1]
+    while values[-1] * 2 <= limit:
+        values.append(values[-1] * 2)
+    if values[-1] != limit:
+        values.append(limit)
+    return values
+
+
+def bench_in_process(X, threads, repeat):
+    policy = ExecutionPolicy(threads=threads).apply()
+    model = policy.configure_model(joblib.load(MODEL_PATH))
+    model.predict(X.iloc[:1000])
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        model.predict(X)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_pool(X, processes, threads, repeat):
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(processes, mp_context=context, initializer=_init_pool_worker,
+                             initargs=(MODEL_PATH, threads)) as pool:
+        # Start every worker and load its model before timing
+        list(pool.map(_predict_chunk, split_rows(X.iloc[:processes * 100], processes)))
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            np.concatenate(list(pool.map(_predict_chunk, split_rows(X, processes))))
+            best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-threads', type=int, default=None, help='default: 2 x cpus (to show oversubscription)')
+    args = parser.parse_args()
+
+    cpus = available_cpus()
+    df = pd.read_csv(os.path.join(ROOT, 'used_car_price_dataset_extended.csv'))[FEATURE_COLUMNS]
+    X = pd.concat([df] * -(-args.rows // len(df)), ignore_index=True).iloc[:args.rows]
+    print(f"{len(X):,} rows, {cpus} cpu(s); auto policy for 1 server worker: {ExecutionPolicy.auto(cpus=cpus).stats()}")
+    print(f"{'processes':>9} {'threads/proc':>12} {'total threads':>13} {'seconds':>9} {'rows/s':>12}")
+
+    max_threads = args.max_threads or cpus * 2
+    for processes in powers_of_two(cpus):
+        for threads in powers_of_two(max_threads):
+            if processes * threads > max_threads:
+                continue
+            if processes == 1:
+                seconds = bench_in_process(X, threads, args.repeat)
+            else:
+                seconds = bench_pool(X, processes, threads, args.repeat)
+            flag = '  (oversubscribed)' if processes * threads > cpus else ''
+            print(f"{processes:>9} {threads:>12} {processes * threads:>13} {seconds:>9.3f} {len(X) / seconds:>12,.0f}{flag}")
+
+
+if __name__ == '__main__':
+    main()
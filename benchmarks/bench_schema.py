@@ -0,0 +1,76 @@
+# benchmarks/bench_schema.py
+# Input preparation in the predict callback: per-row DataFrame + astype casts
+# (the original path) vs one-pass schema validation feeding the compiled predictor.
+#
+#   python benchmarks/bench_schema.py
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+warnings.filterwarnings('ignore')
+
+import joblib
+import pandas as pd
+
+from fast_predict import CompiledPredictor
+from schema import INPUT_SCHEMA
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+FORM_VALUES = {
+    'make_year': 2018, 'mileage_kmpl': 15, 'engine_cc': 1500, 'owner_count': 1,
+    'accidents_reported': 0, 'fuel_type': 'Petrol', 'brand': 'Chevrolet',
+    'transmission': 'Manual', 'color': 'White', 'service_history': 'Full',
+    'insurance_valid': 'Yes'
+}
+
+
+def dataframe_path(values):
+    # The callback's original input preparation
+    input_data = pd.DataFrame({name: [value] for name, value in values.items()})
+    input_data['make_year'] = input_data['make_year'].astype('int64')
+    input_data['mileage_kmpl'] = input_data['mileage_kmpl'].astype('float64')
+    input_data['engine_cc'] = input_data['engine_cc'].astype('int64')
+    input_data['owner_count'] = input_data['owner_count'].astype('int64')
+    input_data['accidents_reported'] = input_data['accidents_reported'].astype('int64')
+    input_data['fuel_type'] = input_data['fuel_type'].astype('str')
+    input_data['brand'] = input_data['brand'].astype('str')
+    input_data['transmission'] = input_data['transmission'].astype('str')
+    input_data['color'] = input_data['color'].astype('str')
+    input_data['service_history'] = input_data['service_history'].astype('str')
+    input_data['insurance_valid'] = input_data['insurance_valid'].astype('str')
+    return input_data
+
+
+def schema_path(values, compiled):
+    record, errors = INPUT_SCHEMA.validate(values)
+    return compiled.encode_records([record])
+
+
+def timeit(fn, n=2000):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    pipeline = joblib.load(os.path.join(ROOT, 'car_price_model_pipeline.pkl'))
+    compiled = CompiledPredictor.from_pipeline(pipeline)
+
+    results = {
+        'prep: DataFrame + 11 astype': timeit(lambda: dataframe_path(FORM_VALUES)),
+        'prep: schema.validate + encode': timeit(lambda: schema_path(FORM_VALUES, compiled)),
+        'end to end: DataFrame + pipeline.predict': timeit(lambda: pipeline.predict(dataframe_path(FORM_VALUES)), n=200),
+        'end to end: schema + compiled predict': timeit(
+            lambda: compiled.predict_encoded(schema_path(FORM_VALUES, compiled)), n=200),
+    }
+    for name, us in results.items():
+        print(f"{name:<45} {us:>10,.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/layout_size.py
+# Size report of the initial /_dash-layout payload: raw and compressed bytes,
+# what share is inline styles and embedded figures, and the inline style
+# dicts repeated most often (candidates for a class in assets/styles.css)
+#
+#   python benchmarks/layout_size.py
+#   python benchmarks/layout_size.py --max-kb 40    # exit 1 above a budget
+import argparse
+import gzip
+import json
+import os
+import sys
+import warnings
+from collections import Counter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+warnings.filterwarnings('ignore')
+
+
+def size(value):
+    return len(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+
+def walk(node, visit):
+    # Depth-first over the serialized component tree
+    if isinstance(node, list):
+        for child in node:
+            walk(child, visit)
+    elif isinstance(node, dict) and 'type' in node and 'props' in node:
+        visit(node)
+        for value in node['props'].values():
+            walk(value, visit)
+
+
+def layout_report(layout):
+    components = Counter()
+    styles = Counter()
+    report = {'components': 0, 'style_bytes': 0, 'figure_bytes': 0, 'class_names': 0}
+
+    def visit(node):
+        props = node['props']
+        report['components'] += 1
+        components[node['type']] += 1
+        if props.get('style'):
+            report['style_bytes'] += size(props['style'])
+            styles[json.dumps(props['style'], sort_keys=True)] += 1
+        if props.get('figure'):
+            report['figure_bytes'] += size(props['figure'])
+        if props.get('className'):
+            report['class_names'] += 1
+
+    walk(layout, visit)
+    report['component_types'] = dict(components.most_common())
+    report['repeated_styles'] = [
+        (style, count, count * len(style.encode('utf-8')))
+        for style, count in styles.most_common() if count > 1
+    ]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report the size of the initial Dash layout.')
+    parser.add_argument('--max-kb', type=float, default=None, help='fail when the raw layout exceeds this size')
+    parser.add_argument('--top', type=int, default=10, help='repeated style dicts to list')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    import app
+
+    body = app.server.test_client().get('/_dash-layout').get_data()
+    layout = json.loads(body)
+    report = layout_report(layout)
+
+    print(f"layout:           {len(body) / 1024:>8.1f} KB raw, {len(gzip.compress(body, 6)) / 1024:.1f} KB gzip")
+    print(f"inline styles:    {report['style_bytes'] / 1024:>8.1f} KB ({report['style_bytes'] / len(body):.0%})")
+    print(f"embedded figures: {report['figure_bytes'] / 1024:>8.1f} KB ({report['figure_bytes'] / len(body):.0%})")
+    print(f"components:       {report['components']:>8} ({report['class_names']} with a className)")
+    print(', '.join(f"{name} x{count}" for name, count in report['component_types'].items()))
+
+    if report['repeated_styles']:
+        print("\nmost repeated inline styles:")
+        for style, count, total in report['repeated_styles'][:args.top]:
+            print(f"  x{count:<3} {total:>6} B  {style[:90]}")
+
+    if args.max_kb is not None and len(body) > args.max_kb * 1024:
+        print(f"\nlayout is over the {args.max_kb:g} KB budget")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,319 @@
+# benchmarks/suite.py
+# End-to-end and micro benchmarks of the app's hot paths, run offline against
+# the bundled CSV and model. Writes a JSON report and compares it with a
+# stored baseline, flagging benchmarks whose median got slower.
+#
+#   python benchmarks/suite.py                      # after a change; exit 1 on regressions
+#   python benchmarks/suite.py --only predict --quick
+#   python benchmarks/suite.py --save-baseline      # re-record after an accepted change
+#
+# benchmarks/baseline.json is the gate: every benchmark, recorded on the
+# current code. Timings are machine-specific, so compare on the machine that
+# recorded it (its CPU count is checked) or re-record there first.
+#
+# benchmarks/baseline-pre-series.json is a reference only: the commit before
+# the performance work (ddc4b10), recorded with this suite copied into a
+# worktree, where benchmarks of features it doesn't have yet are skipped:
+#
+#   git worktree add /tmp/car-baseline ddc4b10
+#   cp benchmarks/suite.py /tmp/car-baseline/benchmarks/suite.py
+#   python /tmp/car-baseline/benchmarks/suite.py --save-baseline --baseline benchmarks/baseline-pre-series.json
+#   python benchmarks/suite.py --baseline benchmarks/baseline-pre-series.json
+#
+# A benchmark that ran in the baseline but is skipped now counts as a regression.
+import argparse
+import functools
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+warnings.filterwarnings('ignore')
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+DEFAULT_REPORT = os.path.join(ROOT, 'benchmarks', 'results', 'latest.json')
+
+# A benchmark regresses when its median is this much slower than the baseline
+# (and by more than MIN_DELTA_MS, so sub-microsecond jitter isn't flagged)
+REGRESSION_THRESHOLD = 0.25
+MIN_DELTA_MS = 0.05
+
+# Per-benchmark thresholds. The app import is timed once per run (not a
+# median), so it is noisier than the rest and only fails on a larger jump.
+# It is meant to be slower than before the performance work: model
+# compilation, warm-up and interval calibration run at import rather than on
+# the first request (LAZY_STARTUP=1 defers them).
+THRESHOLDS = {'startup: import app': 0.5}
+
+# Whole passes over the benchmarks, interleaved so a slow spell on a shared
+# machine hits one pass of many benchmarks rather than every run of one;
+# each benchmark reports its median pass
+DEFAULT_ROUNDS = 3
+
+DATASET_CSV = 'used_car_price_dataset_extended.csv'
+
+FORM = {
+    'input1': 2018, 'input2': 15, 'input3': 1500, 'input5': 1, 'input9': 0,
+    'input4': 'Petrol', 'input6': 'Chevrolet', 'input7': 'Manual', 'input8': 'White',
+    'input10': 'Full', 'input11': 'Yes'
+}
+
+
+def measure(fn, min_time=0.5, min_runs=5, max_runs=2000, warmup=2):
+    # Per-call wall times in ms, repeating until `min_time` seconds have passed
+    for _ in range(warmup):
+        fn()
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    times = np.array(times)
+    return {
+        'runs': len(times),
+        'median_ms': float(np.median(times)),
+        'mean_ms': float(times.mean()),
+        'p95_ms': float(np.percentile(times, 95)),
+        'min_ms': float(times.min())
+    }
+
+
+def lazy(module, name):
+    # Attribute looked up on first use, so a benchmark that needs something
+    # the measured commit doesn't have fails (and is skipped) when it runs
+    return functools.lru_cache(maxsize=None)(lambda: getattr(importlib.import_module(module), name))
+
+
+def ok(response, mimetype='application/json'):
+    # Dash answers unknown paths with its index page, so check the type too
+    if response.status_code not in (200, 204) or response.mimetype != mimetype:
+        raise RuntimeError(f"{response.request.path}: HTTP {response.status_code} {response.mimetype}")
+    return response.get_data()
+
+
+class DashClient:
+    """Posts callback requests to /_dash-update-component like the browser does."""
+
+    def __init__(self, server):
+        self.client = server.test_client()
+        self.dependencies = self.client.get('/_dash-dependencies').get_json()
+
+    def dependency(self, output_id):
+        for dep in self.dependencies:
+            if output_id in dep['output']:
+                return dep
+        raise KeyError(output_id)
+
+    def payload(self, output_id, values):
+        dep = self.dependency(output_id)
+        if dep['output'].startswith('..'):
+            outputs = [dict(zip(('id', 'property'), o.split('.'))) for o in dep['output'].strip('.').split('...')]
+        else:
+            outputs = dict(zip(('id', 'property'), dep['output'].split('.')))
+        return {
+            'output': dep['output'],
+            'outputs': outputs,
+            'inputs': [dict(i, value=values.get(i['id'])) for i in dep['inputs']],
+            'state': [dict(s, value=values.get(s['id'])) for s in dep['state']],
+            'changedPropIds': [f"{dep['inputs'][0]['id']}.{dep['inputs'][0]['property']}"]
+        }
+
+    def call(self, output_id, values):
+        response = self.client.post('/_dash-update-component', json=self.payload(output_id, values))
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"{output_id}: HTTP {response.status_code}")
+        return response
+
+
+def callback_benchmarks(app):
+    dash_client = DashClient(app.server)
+    client = dash_client.client
+    calls = iter(range(10 ** 9))
+
+    def predict_cached():
+        dash_client.call('prediction-output', dict(FORM, **{'predict-button': 1}))
+
+    def predict_uncached():
+        # A new mileage every call defeats the prediction cache
+        mileage = 5 + (next(calls) % 30000) / 1000
+        dash_client.call('prediction-output', dict(FORM, **{'predict-button': 1, 'input2': mileage}))
+
+    listings = pd.read_csv(os.path.join(ROOT, getattr(app, 'DATASET_PATH', DATASET_CSV))).drop(columns='price_usd')
+    batch_1k = json.loads(listings.head(1000).to_json(orient='records'))
+
+    return {
+        'callback: update_prediction (cache hit)': predict_cached,
+        'callback: update_prediction (cache miss)': predict_uncached,
+        'callback: refresh_market_charts (unchanged)': lambda: dash_client.call(
+            'market-version', {'market-refresh': 1, 'market-version': app.figure_cache.version()}),
+        'callback: refresh_market_charts (full payload)': lambda: dash_client.call(
+            'market-version', {'market-refresh': 1, 'market-version': None}),
+        'http: GET /_dash-layout': lambda: ok(client.get('/_dash-layout')),
+        'http: GET /api/figures/brand-price': lambda: ok(client.get('/api/figures/brand-price')),
+        'http: POST /api/predict/batch (1,000 rows)': lambda: ok(client.post('/api/predict/batch', json=batch_1k))
+    }
+
+
+def micro_benchmarks(app):
+    df = pd.read_csv(os.path.join(ROOT, getattr(app, 'DATASET_PATH', DATASET_CSV)))
+    X = df.drop(columns='price_usd')
+    record = X.iloc[0].to_dict()
+    MarketAggregates = lazy('analytics', 'MarketAggregates')
+    # The pipeline as the app serves it (a module-level pickle before the registry)
+    model = functools.lru_cache(maxsize=None)(lambda: app.model_registry.current())
+    pipeline = functools.lru_cache(maxsize=None)(
+        lambda: model().pipeline if hasattr(app, 'model_registry') else app.model_pipeline)
+    aggregates = functools.lru_cache(maxsize=None)(lambda: app.market_store.get())
+
+    benchmarks = {
+        # Frames built up front, so every commit times the same model call
+        'model: pipeline.predict (1 row)': lambda: pipeline().predict(X.iloc[:1]),
+        'model: predict_records (1 row)': lambda: model().predict_records([record]),
+        'model: pipeline.predict (1,000 rows)': lambda: pipeline().predict(X.iloc[:1000]),
+        'model: pipeline.predict (10,000 rows)': lambda: pipeline().predict(X),
+        'model: predict_frame (10,000 rows)': lambda: model().predict_frame(X),
+        'analytics: MarketAggregates.from_frame': lambda: MarketAggregates().from_frame(df),
+        'analytics: percentile_rank x3': lambda: [aggregates().profile[c].percentile_rank(v) for c, v in
+                                                   (('make_year', 2018), ('mileage_kmpl', 15), ('engine_cc', 1500))],
+        'intervals: interval lookup': lambda: app.price_intervals.interval(7545.0),
+        'comparables: top-5 query': lambda: app.comparables.query(record)
+    }
+    try:
+        from figures import MARKET_FIGURES, CachedFigure
+    except ImportError:
+        return benchmarks
+    for name, build in MARKET_FIGURES.items():
+        figure = functools.lru_cache(maxsize=None)(lambda build=build: build(aggregates()))
+        benchmarks[f'figures: serialize {name}'] = lambda figure=figure: CachedFigure(figure())
+    return benchmarks
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import dash
+    import sklearn
+    import xgboost
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'dash': dash.__version__,
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'xgboost': xgboost.__version__
+    }
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD, skipped=()):
+    # name -> (baseline median, current median, relative change, regressed?);
+    # a benchmark that ran in the baseline but was skipped now regressed
+    rows = {}
+    for name, before in baseline.get('results', {}).items():
+        if name in skipped:
+            rows[name] = (before['median_ms'], None, None, True)
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        old, new = before['median_ms'], result['median_ms']
+        change = (new - old) / old if old else 0.0
+        limit = THRESHOLDS.get(name, threshold)
+        rows[name] = (old, new, change, change > limit and new - old > MIN_DELTA_MS)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the app and compare with a stored baseline.')
+    parser.add_argument('--only', default=None, help='run benchmarks whose name contains this text')
+    parser.add_argument('--quick', action='store_true', help='fewer runs per benchmark (noisier)')
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS,
+                        help='passes over all benchmarks; each keeps its median pass')
+    parser.add_argument('--report', default=DEFAULT_REPORT, help='where to write the JSON report')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline report to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='relative slowdown of the median counted as a regression')
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    t0 = time.perf_counter()
+    import app
+    app_import_ms = (time.perf_counter() - t0) * 1000
+
+    benchmarks = dict(callback_benchmarks(app), **micro_benchmarks(app))
+    if args.only:
+        benchmarks = {name: fn for name, fn in benchmarks.items() if args.only in name}
+
+    min_time = 0.1 if args.quick else 0.5
+    results = {'startup: import app': {'runs': 1, 'median_ms': app_import_ms, 'mean_ms': app_import_ms,
+                                       'p95_ms': app_import_ms, 'min_ms': app_import_ms}}
+    skipped = {}
+    passes = {name: [] for name in benchmarks}
+    for _ in range(max(args.rounds, 1)):
+        for name, fn in benchmarks.items():
+            if name in skipped:
+                continue
+            try:
+                passes[name].append(measure(fn, min_time=min_time))
+            except Exception as e:
+                skipped[name] = f"{type(e).__name__}: {e}"
+    for name in benchmarks:
+        if name in skipped:
+            print(f"{name:<52} skipped ({skipped[name][:60]})")
+            continue
+        results[name] = r = sorted(passes[name], key=lambda p: p['median_ms'])[len(passes[name]) // 2]
+        print(f"{name:<52} median {r['median_ms']:>9.3f} ms   p95 {r['p95_ms']:>9.3f} ms   ({r['runs']} runs)")
+
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'environment': environment(), 'results': results,
+              'skipped': skipped}
+    os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nreport written to {os.path.relpath(args.report, ROOT)}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {os.path.relpath(args.baseline, ROOT)}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against (run with --save-baseline first)")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print(f"\ncompared with baseline from commit {baseline['environment'].get('commit')} ({baseline['created']}):")
+    regressions = 0
+    for name, (old, new, change, regressed) in compare(results, baseline, args.threshold, skipped).items():
+        if new is None:
+            regressions += 1
+            print(f"{name:<52} {old:>9.3f} ->    failed     REGRESSION ({skipped[name][:40]})")
+            continue
+        flag = 'REGRESSION' if regressed else ('faster' if change < -args.threshold else '')
+        regressions += regressed
+        print(f"{name:<52} {old:>9.3f} -> {new:>9.3f} ms  {change:>+7.1%}  {flag}")
+    if baseline['environment'].get('cpus') != os.cpu_count():
+        print("warning: baseline was recorded on a machine with a different CPU count")
+    print(f"\n{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# bundle.py
+# Pickle-free model artifact: preprocessing parameters as JSON/.npy plus the
+# booster in XGBoost's native UBJSON format
+#
+#   python bundle.py [model.pkl] [out.bundle] [listings.csv] -- export and verify
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from fast_predict import CompiledPredictor
+
+FORMAT_VERSION = 1
+
+BUNDLE_SUFFIX = '.bundle'
+
+
+def is_bundle(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, 'manifest.json'))
+
+
+def export_bundle(pipeline, out_dir):
+    """Write the fitted pipeline as a bundle directory and return its manifest.
+
+    Raises ValueError if the pipeline can't be compiled (see
+    CompiledPredictor.from_pipeline). The bundle is written to a temporary
+    directory and renamed into place, so a watching server never sees a
+    partial bundle.
+    """
+    import xgboost
+
+    compiled = CompiledPredictor.from_pipeline(pipeline)
+    tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # Rows: imputer fill, scaler mean, scaler scale (one column per numeric feature)
+    numeric = np.array([[fill, mean, scale] for _, fill, mean, scale in compiled.numeric], dtype='float64').T
+    np.save(os.path.join(tmp_dir, 'numeric.npy'), np.ascontiguousarray(numeric), allow_pickle=False)
+    compiled.booster.save_model(os.path.join(tmp_dir, 'model.ubj'))
+
+    digest = hashlib.sha1()
+    for name in ('numeric.npy', 'model.ubj'):
+        with open(os.path.join(tmp_dir, name), 'rb') as f:
+            digest.update(f.read())
+    digest.update(json.dumps(compiled.categorical).encode())
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'version': digest.hexdigest()[:12],
+        'xgboost_version': xgboost.__version__,
+        'iteration_range': list(compiled.iteration_range),
+        'numeric': [name for name, _, _, _ in compiled.numeric],
+        'categorical': [
+            {'name': name, 'fill': fill, 'categories': categories}
+            for name, fill, categories in compiled.categorical
+        ]
+    }
+    # Written last: its presence marks the bundle complete
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return manifest
+
+
+def read_manifest(bundle_dir):
+    with open(os.path.join(bundle_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format_version')} in {bundle_dir}")
+    return manifest
+
+
+def load_bundle(bundle_dir):
+    """Rebuild a CompiledPredictor from a bundle without unpickling anything.
+
+    The numeric parameters (a few floats per column) are read into plain
+    Python lists; the booster is parsed from the UBJSON file.
+    """
+    import xgboost
+
+    manifest = read_manifest(bundle_dir)
+    fill, mean, scale = np.load(os.path.join(bundle_dir, 'numeric.npy'), allow_pickle=False)
+    numeric = list(zip(manifest['numeric'], fill.tolist(), mean.tolist(), scale.tolist()))
+    categorical = [(c['name'], c['fill'], c['categories']) for c in manifest['categorical']]
+
+    booster = xgboost.Booster()
+    booster.load_model(os.path.join(bundle_dir, 'model.ubj'))
+    return CompiledPredictor(numeric, categorical, booster, manifest['iteration_range'])
+
+
+def load_model(path):
+    # A bundle directory or a joblib pickle of the fitted pipeline
+    if is_bundle(path):
+        return load_bundle(path)
+    import joblib
+    return joblib.load(path)
+
+
+if __name__ == '__main__':
+    import joblib
+    import pandas as pd
+    # Imported up front so only the loads themselves are timed
+    import sklearn.pipeline
+    import xgboost
+
+    from utils import FEATURE_COLUMNS
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else 'car_price_model_pipeline.pkl'
+    out_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(model_path)[0] + BUNDLE_SUFFIX
+    csv_path = sys.argv[3] if len(sys.argv) > 3 else 'used_car_price_dataset_extended.csv'
+
+    t0 = time.perf_counter()
+    pipeline = joblib.load(model_path)
+    pickle_ms = (time.perf_counter() - t0) * 1000
+    manifest = export_bundle(pipeline, out_dir)
+
+    t0 = time.perf_counter()
+    predictor = load_bundle(out_dir)
+    bundle_ms = (time.perf_counter() - t0) * 1000
+
+    X = pd.read_csv(csv_path)[FEATURE_COLUMNS]
+    expected = pipeline.predict(X)
+    frame_identical = np.array_equal(predictor.predict(X), expected)
+    records_identical = np.array_equal(predictor.predict_records(X.to_dict('records')),
+                                       CompiledPredictor.from_pipeline(pipeline).predict_records(X.to_dict('records')))
+    print(f"wrote {out_dir} (version {manifest['version']})")
+    print(f"load: joblib {pickle_ms:.1f} ms, bundle {bundle_ms:.1f} ms")
+    print(f"{len(X)} rows bit-identical to pipeline.predict: {frame_identical}, "
+          f"per-record path: {records_identical}")
+    sys.exit(0 if frame_identical and records_identical else 1)
@@ -0,0 +1,100 @@
+# cache.py
+# Bounded LRU cache of predicted prices keyed on the normalized model input
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils import NUMERIC_CASTS, NUMERIC_FEATURES, CATEGORICAL_FEATURES
+
+
+def feature_key(record):
+    # Same casts the model input goes through, so equivalent inputs share an entry
+    return (
+        tuple(NUMERIC_CASTS[dtype](record[col]) for col, dtype in NUMERIC_FEATURES.items())
+        + tuple(str(record[col]) for col in CATEGORICAL_FEATURES)
+    )
+
+
+class PredictionCache:
+    """LRU map from feature tuple to price.
+
+    Entries expire after `ttl` seconds when it is positive (unset, 0 or a
+    negative value means they never expire), and the whole cache is
+    dropped when `model_version()` changes. Keys include the model version,
+    so a price computed by the old model and stored after a swap is never
+    served.
+    """
+
+    def __init__(self, max_size=4096, ttl=None, model_version=None):
+        self.max_size = int(max_size)
+        # From the environment ttl is a string, so '0' must be checked as a number
+        self.ttl = float(ttl) if ttl else None
+        if self.ttl is not None and self.ttl <= 0:
+            self.ttl = None
+        self.model_version = model_version or (lambda: None)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (model version, features) -> (stored_at, price)
+        self._version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls, model_version=None):
+        return cls(
+            max_size=os.environ.get('PREDICTION_CACHE_SIZE', 4096),
+            ttl=os.environ.get('PREDICTION_CACHE_TTL'),
+            model_version=model_version
+        )
+
+    def _check_model(self, version):
+        if version != self._version:
+            if self._version is not None:
+                self._entries.clear()
+                self.invalidations += 1
+            self._version = version
+
+    def get_or_compute(self, record, compute):
+        if self.max_size <= 0:
+            return compute(record)
+
+        version = self.model_version()
+        key = (version, feature_key(record))
+        now = time.monotonic()
+        with self._lock:
+            self._check_model(version)
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or now - entry[0] < self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Compute outside the lock so concurrent misses can be batched together
+        price = compute(record)
+
+        with self._lock:
+            self._entries[key] = (now, price)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return price
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,119 @@
+# comparables.py
+# Nearest comparable listings: one KD-tree per (brand, fuel type, transmission)
+import hashlib
+import threading
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from schema import INPUT_SCHEMA
+
+PARTITION_COLUMNS = ['brand', 'fuel_type', 'transmission']
+DISTANCE_COLUMNS = ['make_year', 'mileage_kmpl', 'engine_cc']
+
+# Columns shown for each comparable
+DISPLAY_COLUMNS = ['make_year', 'mileage_kmpl', 'engine_cc', 'owner_count', 'accidents_reported', 'price_usd']
+
+# Distances are measured on the schema's input ranges rather than the data's
+# spread, so the scaling (and therefore every unchanged partition's tree)
+# stays the same when the dataset is refreshed
+SCALE = np.array([INPUT_SCHEMA[c].maximum - INPUT_SCHEMA[c].minimum for c in DISTANCE_COLUMNS], dtype='float64')
+
+COMPARABLES_K = 5
+
+
+class Partition:
+    """The listings of one (brand, fuel_type, transmission) and their tree."""
+
+    def __init__(self, rows, signature):
+        self.rows = rows  # column -> array of DISPLAY_COLUMNS values
+        self.signature = signature
+        points = np.column_stack([rows[c] for c in DISTANCE_COLUMNS]).astype('float64') / SCALE
+        self.tree = cKDTree(points)
+        self.size = len(points)
+
+
+def partition_signature(rows):
+    digest = hashlib.sha1()
+    for col in DISPLAY_COLUMNS:
+        digest.update(np.ascontiguousarray(rows[col]).tobytes())
+    return digest.hexdigest()
+
+
+class ComparablesIndex:
+    """Top-k nearest listings within the same brand, fuel type and transmission.
+
+    Built from the dataset frame; when `previous` is given, partitions whose
+    listings haven't changed keep their existing tree.
+    """
+
+    def __init__(self, df, previous=None):
+        t0 = time.perf_counter()
+        self.partitions = {}
+        self.reused = 0
+        old = previous.partitions if previous is not None else {}
+
+        groups = df.groupby(PARTITION_COLUMNS, observed=True, sort=False).indices
+        columns = {col: df[col].to_numpy() for col in DISPLAY_COLUMNS}
+        for key, positions in groups.items():
+            key = tuple(str(k) for k in key)
+            rows = {col: values[positions] for col, values in columns.items()}
+            signature = partition_signature(rows)
+            if key in old and old[key].signature == signature:
+                self.partitions[key] = old[key]
+                self.reused += 1
+            else:
+                self.partitions[key] = Partition(rows, signature)
+        self.build_ms = (time.perf_counter() - t0) * 1000
+
+    def query(self, record, k=COMPARABLES_K):
+        # List of dicts (DISPLAY_COLUMNS plus 'distance'), nearest first
+        partition = self.partitions.get(tuple(str(record[c]) for c in PARTITION_COLUMNS))
+        if partition is None:
+            return []
+        point = np.array([float(record[c]) for c in DISTANCE_COLUMNS]) / SCALE
+        k = min(k, partition.size)
+        distances, positions = partition.tree.query(point, k=k)
+        distances, positions = np.atleast_1d(distances), np.atleast_1d(positions)
+        return [
+            dict({col: partition.rows[col][i].item() for col in DISPLAY_COLUMNS}, distance=float(d))
+            for d, i in zip(distances, positions)
+        ]
+
+
+class ComparablesCache:
+    """ComparablesIndex for the current dataset, rebuilt incrementally when it changes."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._version = object()
+        self._index = None
+        self.rebuilds = 0
+
+    def get(self):
+        aggregates = self.store.get()
+        if aggregates.version != self._version:
+            with self._lock:
+                if aggregates.version != self._version:
+                    self._index = ComparablesIndex(self.store.df, previous=self._index)
+                    self._version = aggregates.version
+                    self.rebuilds += 1
+        return self._index
+
+    def query(self, record, k=COMPARABLES_K):
+        return self.get().query(record, k)
+
+    def stats(self):
+        index = self._index
+        if index is None:
+            return {'built': False}
+        return {
+            'built': True,
+            'partitions': len(index.partitions),
+            'listings': sum(p.size for p in index.partitions.values()),
+            'reused_partitions': index.reused,
+            'build_ms': round(index.build_ms, 1),
+            'rebuilds': self.rebuilds
+        }
@@ -0,0 +1,148 @@
+# dataset.py
+# Typed, columnar on-disk cache of the listings CSV, memory-mapped at startup
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+# Default cache location, next to the CSV unless DATASET_CACHE_DIR is set
+CACHE_SUFFIX = '.columns'
+
+CATEGORICAL_COLUMNS = ['fuel_type', 'brand', 'transmission', 'color', 'service_history', 'insurance_valid']
+
+# Narrowest integer type each column is stored as (wider values keep int64)
+NARROW_INTS = {
+    'make_year': 'int16',
+    'engine_cc': 'int16',
+    'owner_count': 'int8',
+    'accidents_reported': 'int8'
+}
+
+
+def cache_dir_for(csv_path):
+    base = os.environ.get('DATASET_CACHE_DIR')
+    if base:
+        return os.path.join(base, os.path.basename(csv_path) + CACHE_SUFFIX)
+    return csv_path + CACHE_SUFFIX
+
+
+def _source_stamp(csv_path):
+    st = os.stat(csv_path)
+    return {'mtime_ns': st.st_mtime_ns, 'size': st.st_size}
+
+
+def _narrow(values, dtype):
+    info = np.iinfo(dtype)
+    if len(values) and (values.min() < info.min or values.max() > info.max):
+        return values
+    return values.astype(dtype)
+
+
+def convert_csv(csv_path, cache_dir=None, df=None):
+    """Write one .npy file per column plus a manifest describing the dtypes.
+
+    The cache is written to a temporary directory and renamed into place, so
+    concurrent workers never see a partial cache.
+    """
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    stamp = _source_stamp(csv_path)
+    if df is None:
+        df = pd.read_csv(csv_path)
+
+    tmp_dir = f"{cache_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    manifest = {'format_version': FORMAT_VERSION, 'source': stamp, 'rows': len(df), 'columns': []}
+    for col in df.columns:
+        entry = {'name': col}
+        if col in CATEGORICAL_COLUMNS:
+            cat = pd.Categorical(df[col])
+            codes_dtype = 'int8' if len(cat.categories) < 128 else 'int32'
+            values = cat.codes.astype(codes_dtype)
+            entry['kind'] = 'category'
+            entry['categories'] = [str(c) for c in cat.categories]
+        elif col in NARROW_INTS and pd.api.types.is_integer_dtype(df[col]):
+            values = _narrow(df[col].to_numpy(), NARROW_INTS[col])
+            entry['kind'] = 'numeric'
+        else:
+            values = df[col].to_numpy()
+            if values.dtype == object:
+                values = values.astype('str')
+            entry['kind'] = 'numeric' if values.dtype.kind in 'iufb' else 'string'
+        entry['dtype'] = values.dtype.str
+        np.save(os.path.join(tmp_dir, f"{col}.npy"), values, allow_pickle=False)
+        manifest['columns'].append(entry)
+
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    try:
+        os.replace(tmp_dir, cache_dir)
+    except OSError:
+        # Another worker won the race; its cache is just as good
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return cache_dir
+
+
+def read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(csv_path, cache_dir):
+    manifest = read_manifest(cache_dir)
+    return (
+        manifest is not None
+        and manifest.get('format_version') == FORMAT_VERSION
+        and manifest.get('source') == _source_stamp(csv_path)
+    )
+
+
+def load_columns(cache_dir, mmap_mode='r'):
+    # Arrays stay backed by the page cache; nothing is parsed or copied
+    manifest = read_manifest(cache_dir)
+    data = {}
+    for entry in manifest['columns']:
+        values = np.load(os.path.join(cache_dir, f"{entry['name']}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+        if entry['kind'] == 'category':
+            values = pd.Categorical.from_codes(values, entry['categories'])
+        data[entry['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def load_listings(csv_path, cache_dir=None):
+    """Load the listings dataset, preferring the memory-mapped columnar cache.
+
+    Falls back to parsing the CSV (and refreshes the cache) when the cache is
+    missing, from an older format, or older than the CSV.
+    """
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    if is_fresh(csv_path, cache_dir):
+        try:
+            return load_columns(cache_dir)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    df = pd.read_csv(csv_path)
+    try:
+        convert_csv(csv_path, cache_dir, df=df)
+        return load_columns(cache_dir)
+    except (OSError, ValueError, KeyError):
+        # Read-only deploys still work, just without the fast path
+        return df
+
+
+if __name__ == '__main__':
+    # python dataset.py [listings.csv] -- build the columnar cache ahead of deploy
+    path = sys.argv[1] if len(sys.argv) > 1 else 'used_car_price_dataset_extended.csv'
+    print(convert_csv(path))
@@ -0,0 +1,250 @@
+# delivery.py
+# Bytes on the wire: gzip/brotli compression of responses (with the encoded
+# variants of repeated payloads kept in memory), content-fingerprinted
+# asset URLs that browsers can cache forever, and the initial layout
+# serialized once and served with an ETag
+import gzip
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli  # optional: pip install Brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this aren't worth the CPU or the extra header bytes
+COMPRESS_MIN_BYTES = 1024
+
+# Mid-range levels: most of the size win for a fraction of the CPU of the max
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Compressible mimetypes (Dash JSON, the index page, scripts and styles)
+COMPRESSIBLE_TYPES = frozenset((
+    'application/json', 'application/javascript', 'text/javascript', 'text/html',
+    'text/css', 'text/plain', 'text/csv', 'image/svg+xml'
+))
+
+# Fingerprinted asset URLs are cached for a year and never revalidated
+# (a bare /assets/ URL keeps Flask's default: revalidate every time)
+IMMUTABLE_MAX_AGE = 31536000
+
+# A compressed body is a different representation, so its ETag gets the
+# encoding appended ("<tag>-gzip"); the suffix is stripped from
+# If-None-Match before the views compare it against their own tags
+ETAG_SUFFIX = re.compile(r'-(br|gzip)"')
+ETAG_ENCODING_KEY = 'delivery.etag_encoding'
+
+
+def accepted_encoding(accept_encoding):
+    # Best encoding the client accepts: brotli if installed, then gzip
+    accepted = {
+        part.split(';')[0].strip().lower()
+        for part in (accept_encoding or '').split(',')
+        if not part.strip().endswith(('q=0', 'q=0.0'))
+    }
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def strip_etag_suffix(environ):
+    # Rewrite If-None-Match to the uncompressed tags (Dash compares the tag
+    # of its component bundles verbatim), remembering the encoding for the 304
+    header = environ.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return
+    match = ETAG_SUFFIX.search(header)
+    if match:
+        environ[ETAG_ENCODING_KEY] = match.group(1)
+        environ['HTTP_IF_NONE_MATCH'] = ETAG_SUFFIX.sub('"', header)
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class ResponseCompressor:
+    """Compresses response bodies for clients that accept gzip or brotli.
+
+    Encoded bodies of at least `cache_min_bytes` are kept in an LRU keyed on
+    the body's digest (its ETag when it has one), so a payload served over
+    and over -- the layout, the market figures, the Dash and Plotly bundles --
+    is compressed once per encoding. Streamed and already-encoded responses
+    are passed through.
+    """
+
+    def __init__(self, min_bytes=COMPRESS_MIN_BYTES, cache_size=64, cache_min_bytes=16384):
+        self.min_bytes = min_bytes
+        self.cache_size = cache_size
+        self.cache_min_bytes = cache_min_bytes
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # (digest, encoding) -> compressed bytes
+        self.compressed = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            min_bytes=int(os.environ.get('COMPRESS_MIN_BYTES', COMPRESS_MIN_BYTES)),
+            cache_size=int(os.environ.get('COMPRESS_CACHE_SIZE', 64))
+        )
+
+    def compressible(self, response):
+        return (
+            response.status_code == 200
+            and not response.is_streamed
+            and not response.direct_passthrough
+            and 'Content-Encoding' not in response.headers
+            and response.mimetype in COMPRESSIBLE_TYPES
+        )
+
+    def encoded(self, data, encoding, etag=None):
+        if len(data) < self.cache_min_bytes or not self.cache_size:
+            return compress(data, encoding)
+
+        key = (etag or hashlib.sha1(data).hexdigest(), encoding)
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return body
+        body = compress(data, encoding)
+        with self._lock:
+            self._cache[key] = body
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return body
+
+    def process(self, request, response):
+        if response.status_code == 304:
+            # Echo the tag the client revalidated, encoding suffix included
+            etag, weak = response.get_etag()
+            encoding = request.environ.get(ETAG_ENCODING_KEY)
+            if etag and encoding:
+                response.set_etag(f"{etag}-{encoding}", weak)
+            return response
+        if not self.compressible(response):
+            return response
+        # Caches must keep one copy per encoding
+        response.vary.add('Accept-Encoding')
+        encoding = accepted_encoding(request.headers.get('Accept-Encoding'))
+        data = response.get_data()
+        if encoding is None or len(data) < self.min_bytes:
+            return response
+
+        etag, weak = response.get_etag()
+        body = self.encoded(data, encoding, etag)
+        if len(body) >= len(data):
+            return response
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(body)
+        return response
+
+    def warm(self, server, paths):
+        # Request `paths` once per encoding so their compressed bodies are
+        # cached (in the gunicorn master, before the workers fork)
+        client = server.test_client()
+        for encoding in ('br', 'gzip') if brotli is not None else ('gzip',):
+            for path in paths:
+                client.get(path, headers={'Accept-Encoding': encoding})
+
+    def stats(self):
+        with self._lock:
+            return {
+                'brotli_available': brotli is not None,
+                'compressed_responses': self.compressed,
+                'cache_hits': self.cache_hits,
+                'cached_payloads': len(self._cache),
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'ratio': round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None
+            }
+
+
+class CachedLayout:
+    """The /_dash-layout response, serialized once per layout object.
+
+    Dash rebuilds the layout JSON on every page load; a static layout only
+    needs it once, and its ETag lets browsers revalidate with a 304 instead
+    of downloading it again. Layouts given as a function are per-request
+    and go straight to Dash's own view.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.endpoint = app.config.routes_pathname_prefix + '_dash-layout'
+        self.view = None  # Dash's view, set by register_layout
+        self._lock = threading.Lock()
+        self._key = None
+        self._body = None
+        self.etag = None
+
+    def response(self, request, response_class):
+        layout = self.app.layout
+        if callable(layout):
+            return self.view()
+        if id(layout) != self._key:
+            with self._lock:
+                if id(layout) != self._key:
+                    self._body = self.view().get_data()
+                    self.etag = hashlib.sha1(self._body).hexdigest()
+                    self._key = id(layout)
+        response = response_class(self._body, mimetype='application/json')
+        response.set_etag(self.etag)
+        # Revalidate on every load, so a deploy shows up immediately
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+
+class AssetFingerprints:
+    """Content hashes of the files in the assets folder.
+
+    `url(name)` appends `?v=<hash>` to the asset's URL; a request carrying
+    the current hash gets an immutable one-year Cache-Control, since a new
+    file means a new URL. The hashes are taken once at startup; assets only
+    change on deploy.
+    """
+
+    def __init__(self, folder, url_prefix='/assets/'):
+        self.folder = folder
+        self.url_prefix = url_prefix
+        self.hashes = {}
+        for root, _, files in os.walk(folder):
+            for name in files:
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    digest = hashlib.sha1(f.read()).hexdigest()[:12]
+                self.hashes[os.path.relpath(path, folder).replace(os.sep, '/')] = digest
+
+    def url(self, name):
+        digest = self.hashes.get(name)
+        return f"{self.url_prefix}{name}" + (f"?v={digest}" if digest else '')
+
+    def cache_headers(self, request, response):
+        if not request.path.startswith(self.url_prefix) or response.status_code not in (200, 304):
+            return response
+        name = request.path[len(self.url_prefix):]
+        # `m` is the modification-time stamp Dash adds to the CSS/JS it links
+        if name in self.hashes and (request.args.get('v') == self.hashes[name] or 'm' in request.args):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response
@@ -0,0 +1,198 @@
+# execution.py
+# Thread and process budget for model inference, so gunicorn workers, XGBoost's
+# OpenMP pool and NumPy's BLAS threads don't oversubscribe the cores
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+# Batches at least this large are split across the process pool (when enabled)
+PROCESS_MIN_ROWS = 20000
+
+
+def available_cpus():
+    # Cores this process may run on (respects taskset / cgroup cpusets)
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+class ExecutionPolicy:
+    """How many threads and processes one server worker may use for inference.
+
+    `threads` bounds every native thread pool in the process (XGBoost's
+    nthread, OpenMP and BLAS). `processes` > 1 enables the process pool for
+    batches of at least `process_min_rows` rows; each pool process then gets
+    `pool_threads` threads so the pool as a whole stays within the budget.
+    """
+
+    def __init__(self, threads=1, processes=1, process_min_rows=PROCESS_MIN_ROWS, cpus=None, server_workers=1):
+        self.threads = max(1, int(threads))
+        self.processes = max(1, int(processes))
+        self.process_min_rows = int(process_min_rows)
+        self.cpus = cpus or available_cpus()
+        self.server_workers = server_workers
+        self.pool_threads = max(1, self.threads // self.processes)
+
+    @classmethod
+    def auto(cls, server_workers=1, threads=None, processes=None, process_min_rows=PROCESS_MIN_ROWS, cpus=None):
+        # Split the cores evenly between the server's worker processes; each
+        # worker may use its share as threads for small calls or as a pool of
+        # single-threaded processes for large batches
+        cpus = cpus or available_cpus()
+        server_workers = max(1, server_workers or 1)
+        budget = max(1, cpus // server_workers)
+        return cls(
+            threads=threads or budget,
+            processes=processes or budget,
+            process_min_rows=process_min_rows,
+            cpus=cpus,
+            server_workers=server_workers
+        )
+
+    @classmethod
+    def from_env(cls):
+        # WEB_CONCURRENCY is the gunicorn worker count (gunicorn.conf.py sets it
+        # when it picks the default); INFERENCE_* override the automatic sizing
+        return cls.auto(
+            server_workers=_env_int('WEB_CONCURRENCY'),
+            threads=_env_int('INFERENCE_THREADS'),
+            processes=_env_int('INFERENCE_PROCESSES'),
+            process_min_rows=_env_int('INFERENCE_PROCESS_MIN_ROWS') or PROCESS_MIN_ROWS
+        )
+
+    def apply(self):
+        # BLAS limits are process-wide and inherited by forked workers. OpenMP
+        # limits only cover the calling thread, which is why XGBoost's own
+        # nthread is also set (configure_model)
+        threadpool_limits(limits=self.threads)
+        return self
+
+    def configure_model(self, model, threads=None):
+        """Set the booster's nthread on a fitted pipeline, XGBoost model or
+        CompiledPredictor loaded from a bundle.
+
+        The compiled predictor shares the pipeline's booster, so configuring
+        the pipeline covers both paths. Returns the model for chaining.
+        """
+        threads = threads or self.threads
+        estimator = model.steps[-1][1] if hasattr(model, 'steps') else model
+        if hasattr(estimator, 'get_booster'):
+            estimator.n_jobs = threads
+            estimator.get_booster().set_param('nthread', threads)
+        elif hasattr(estimator, 'booster'):
+            estimator.booster.set_param('nthread', threads)
+        return model
+
+    def stats(self):
+        return {
+            'cpus': self.cpus,
+            'server_workers': self.server_workers,
+            'threads': self.threads,
+            'processes': self.processes,
+            'pool_threads': self.pool_threads,
+            'process_min_rows': self.process_min_rows
+        }
+
+
+# Model held by each process-pool worker
+_pool_model = None
+
+
+def _init_pool_worker(model_path, threads):
+    global _pool_model
+    from bundle import load_model
+
+    policy = ExecutionPolicy(threads=threads).apply()
+    _pool_model = policy.configure_model(load_model(model_path))
+
+
+def _predict_chunk(chunk):
+    return _pool_model.predict(chunk)
+
+
+def split_rows(df, parts):
+    # Contiguous, nearly equal slices of a frame
+    bounds = np.linspace(0, len(df), parts + 1).astype(int)
+    return [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+class BatchScorer:
+    """Batch predictions under an ExecutionPolicy.
+
+    `registry` is the ModelRegistry serving the current model. Small batches
+    are predicted in-process. Batches of at least `policy.process_min_rows`
+    rows are split across a process pool whose workers load their own copy
+    of the model from its path. The pool is started on first use (with the
+    spawn method, since OpenMP's thread pool doesn't survive fork) and
+    restarted when the registry swaps in a new version.
+    """
+
+    def __init__(self, registry, policy):
+        self.registry = registry
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_key = None
+        self.in_process_batches = 0
+        self.pool_batches = 0
+        self.pool_starts = 0
+
+    def _get_pool(self, model):
+        key = (os.getpid(), model.version)
+        with self._lock:
+            if self._pool_key != key:
+                # A pool inherited through fork belongs to the parent; just drop it
+                if self._pool is not None and self._pool_key[0] == os.getpid():
+                    self._pool.shutdown(wait=False)
+                self._pool = ProcessPoolExecutor(
+                    self.policy.processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_pool_worker,
+                    initargs=(model.path, self.policy.pool_threads)
+                )
+                self._pool_key = key
+                self.pool_starts += 1
+            return self._pool
+
+    def use_pool(self, rows):
+        return self.policy.processes > 1 and rows >= self.policy.process_min_rows
+
+    def current_model(self):
+        return self.registry.current()
+
+    def predict(self, X, model=None):
+        # `model` pins the ModelVersion to use (default: the current one)
+        model = model or self.registry.current()
+        if not self.use_pool(len(X)):
+            self.in_process_batches += 1
+            return model.predict(X)
+
+        pool = self._get_pool(model)
+        self.pool_batches += 1
+        chunks = split_rows(X, self.policy.processes)
+        return np.concatenate(list(pool.map(_predict_chunk, chunks)))
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_key[0] == os.getpid():
+                self._pool.shutdown()
+            self._pool = self._pool_key = None
+
+    def stats(self):
+        return dict(
+            self.policy.stats(),
+            in_process_batches=self.in_process_batches,
+            pool_batches=self.pool_batches,
+            pool_starts=self.pool_starts,
+            pool_running=self._pool is not None and self._pool_key[0] == os.getpid()
+        )
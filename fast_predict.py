@@ -0,0 +1,172 @@
+# fast_predict.py
+# Compiled inference path that skips pandas/sklearn dispatch for the fitted pipeline
+import math
+import sys
+import time
+
+import numpy as np
+
+from utils import FEATURE_COLUMNS, NUMERIC_CASTS, NUMERIC_FEATURES, make_feature_frame
+
+
+class CompiledPredictor:
+    """Feature encoding of the fitted pipeline as plain arrays, plus its booster.
+
+    Reproduces SimpleImputer -> StandardScaler for the numeric columns and
+    SimpleImputer -> OneHotEncoder(handle_unknown='ignore') for the
+    categoricals, then calls `Booster.inplace_predict` on the encoded rows.
+    The `car_age` column added by the first step is dropped by the
+    ColumnTransformer, so it is not computed here.
+    """
+
+    def __init__(self, numeric, categorical, booster, iteration_range=(0, 0)):
+        # numeric: [(name, fill, mean, scale)], categorical: [(name, fill, categories)]
+        self.numeric = numeric
+        self.categorical = categorical
+        self.booster = booster
+        self.iteration_range = tuple(iteration_range)
+
+        self.n_numeric = len(numeric)
+        self.num_mean = np.array([mean for _, _, mean, _ in numeric], dtype='float64')
+        self.num_scale = np.array([scale for _, _, _, scale in numeric], dtype='float64')
+
+        # Output column of every (feature, category) pair
+        self.cat_index = []
+        offset = self.n_numeric
+        for _, _, categories in categorical:
+            self.cat_index.append({value: offset + i for i, value in enumerate(categories)})
+            offset += len(categories)
+        self.n_features = offset
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Extract the fitted parameters, or raise ValueError if the pipeline
+        isn't the add_car_age -> ColumnTransformer -> XGBRegressor layout."""
+        try:
+            preprocessor = pipeline.named_steps['preprocessor']
+            model = pipeline.named_steps['model']
+            transformers = {name: (steps, list(cols)) for name, steps, cols in preprocessor.transformers_ if name != 'remainder'}
+            num_steps, num_cols = transformers['num']
+            cat_steps, cat_cols = transformers['cat']
+            num_imputer, scaler = num_steps.named_steps['imputer'], num_steps.named_steps['scaler']
+            cat_imputer, encoder = cat_steps.named_steps['imputer'], cat_steps.named_steps['encoder']
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Unsupported pipeline layout: {e}") from e
+
+        if preprocessor.remainder != 'drop' or set(transformers) != {'num', 'cat'}:
+            raise ValueError("Unsupported ColumnTransformer: expected only 'num' and 'cat' with remainder='drop'")
+        if encoder.handle_unknown != 'ignore' or encoder.drop_idx_ is not None:
+            raise ValueError("Unsupported OneHotEncoder: expected handle_unknown='ignore' and no dropped columns")
+
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(len(num_cols))
+        scale = scaler.scale_ if scaler.with_std else np.ones(len(num_cols))
+        numeric = [
+            (col, float(fill), float(m), float(s))
+            for col, fill, m, s in zip(num_cols, num_imputer.statistics_, mean, scale)
+        ]
+        categorical = [
+            (col, str(fill), [str(c) for c in categories])
+            for col, fill, categories in zip(cat_cols, cat_imputer.statistics_, encoder.categories_)
+        ]
+
+        try:
+            iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            iteration_range = (0, 0)
+        return cls(numeric, categorical, model.get_booster(), iteration_range)
+
+    def encode_records(self, records):
+        # Same casts as utils.make_feature_frame: int/float for numerics, str() for categoricals
+        X = np.zeros((len(records), self.n_features), dtype='float64')
+        for row, record in enumerate(records):
+            for j, (col, fill, _, _) in enumerate(self.numeric):
+                value = NUMERIC_CASTS[NUMERIC_FEATURES[col]](record[col])
+                X[row, j] = fill if math.isnan(value) else value
+            for index, (col, _, _) in zip(self.cat_index, self.categorical):
+                position = index.get(str(record[col]))
+                if position is not None:
+                    X[row, position] = 1.0
+        X[:, :self.n_numeric] -= self.num_mean
+        X[:, :self.n_numeric] /= self.num_scale
+        return X
+
+    def encode_frame(self, df):
+        # Vectorized encoding of a typed frame; missing values get the imputer fills
+        X = np.zeros((len(df), self.n_features), dtype='float64')
+        for j, (col, fill, _, _) in enumerate(self.numeric):
+            values = df[col].to_numpy(dtype='float64', na_value=np.nan)
+            X[:, j] = np.where(np.isnan(values), fill, values)
+        X[:, :self.n_numeric] -= self.num_mean
+        X[:, :self.n_numeric] /= self.num_scale
+
+        rows = np.arange(len(df))
+        for index, (col, fill, _) in zip(self.cat_index, self.categorical):
+            values = df[col].astype('object')
+            values = values.where(values.notna(), fill).astype('str').to_numpy()
+            positions = np.fromiter((index.get(v, -1) for v in values), dtype='int64', count=len(values))
+            known = positions >= 0
+            X[rows[known], positions[known]] = 1.0
+        return X
+
+    def predict_encoded(self, X):
+        return self.booster.inplace_predict(X, iteration_range=self.iteration_range)
+
+    def predict_records(self, records):
+        return self.predict_encoded(self.encode_records(records))
+
+    def predict_record(self, record):
+        return float(self.predict_records([record])[0])
+
+    def predict(self, df):
+        return self.predict_encoded(self.encode_frame(df))
+
+
+def compile_pipeline(pipeline):
+    # None when the pipeline can't be compiled; callers fall back to pipeline.predict
+    try:
+        return CompiledPredictor.from_pipeline(pipeline)
+    except ValueError:
+        return None
+
+
+def check_parity(pipeline, df):
+    """Compare the compiled paths with pipeline.predict on every row of `df`.
+
+    Returns the largest absolute difference for the vectorized frame path
+    and the per-record path.
+    """
+    compiled = CompiledPredictor.from_pipeline(pipeline)
+    X = df[FEATURE_COLUMNS]
+    expected = pipeline.predict(X)
+    frame_diff = float(np.max(np.abs(compiled.predict(X) - expected)))
+
+    records = X.to_dict('records')
+    expected_records = pipeline.predict(make_feature_frame(records))
+    record_diff = float(np.max(np.abs(compiled.predict_records(records) - expected_records)))
+    return frame_diff, record_diff
+
+
+if __name__ == '__main__':
+    # python fast_predict.py [model.pkl] [listings.csv] -- parity and latency check
+    import joblib
+    import pandas as pd
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else 'car_price_model_pipeline.pkl'
+    csv_path = sys.argv[2] if len(sys.argv) > 2 else 'used_car_price_dataset_extended.csv'
+    pipeline = joblib.load(model_path)
+    df = pd.read_csv(csv_path)
+
+    frame_diff, record_diff = check_parity(pipeline, df)
+    print(f"rows: {len(df)}  max |diff| frame path: {frame_diff}  record path: {record_diff}")
+
+    compiled = CompiledPredictor.from_pipeline(pipeline)
+    record = df[FEATURE_COLUMNS].iloc[0].to_dict()
+    for name, fn in [('pipeline', lambda: pipeline.predict(make_feature_frame([record]))),
+                     ('compiled', lambda: compiled.predict_record(record))]:
+        n = 200
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        print(f"{name:>9}: {(time.perf_counter() - t0) / n * 1e6:,.0f} us per single-row prediction")
+
+    sys.exit(0 if frame_diff == 0 and record_diff == 0 else 1)
@@ -0,0 +1,156 @@
+# figures.py
+# Market chart figures, built once per dataset version and kept pre-serialized
+import hashlib
+import threading
+
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from metrics import metrics
+
+
+def brand_price_figure(aggregates):
+    fig = px.bar(
+        aggregates.brand_avg_prices,
+        x='brand',
+        y='price_usd',
+        title='Average Price by Brand',
+        color='price_usd',
+        color_continuous_scale='viridis'
+    )
+
+    fig.update_layout(
+        title_font_size=18,
+        title_x=0.5,
+        xaxis_title='Brand',
+        yaxis_title='Average Price ($)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=12, color='#1E1E1E'),
+        showlegend=False
+    )
+
+    fig.update_traces(
+        texttemplate='$%{y:,.0f}',
+        textposition='outside'
+    )
+
+    fig.update_xaxes(tickangle=45)
+
+    return fig
+
+
+def brand_popularity_figure(aggregates):
+    fig = px.pie(
+        aggregates.brand_counts,
+        values='count',
+        names='brand',
+        title='Brand Market Share (by listing count)',
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+
+    fig.update_layout(
+        title_font_size=18,
+        title_x=0.5,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=12, color='#1E1E1E')
+    )
+
+    fig.update_traces(
+        textposition='inside',
+        textinfo='percent+label'
+    )
+
+    return fig
+
+
+def depreciation_figure(aggregates):
+    year_avg_prices = aggregates.year_avg_prices
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=year_avg_prices['make_year'],
+        y=year_avg_prices['value_retention'],
+        mode='lines+markers',
+        name='Vehicle Value',
+        line=dict(color='#FF6B6B', width=4),  # Coral
+        marker=dict(size=8, color='#E55A5A'),
+        fill='tonexty'
+    ))
+
+    fig.update_layout(
+        title='Vehicle Value Retention by Year',
+        title_font_size=18,
+        title_x=0.5,
+        xaxis_title='Make Year',
+        yaxis_title='Value Retention (%)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=12, color='#1E1E1E'),
+        hovermode='x unified'
+    )
+
+    return fig
+
+
+def slim_template(fig):
+    # The default template carries style defaults for every plotly trace
+    # type (~7 KB per figure); keep only those of the traces actually drawn
+    template = fig.layout.template
+    used = {trace.type for trace in fig.data}
+    data = {name: traces for name, traces in template.data.to_plotly_json().items() if name in used}
+    fig.layout.template = go.layout.Template(layout=template.layout, data=data)
+    return fig
+
+
+MARKET_FIGURES = {
+    'brand-price': brand_price_figure,
+    'brand-popularity': brand_popularity_figure,
+    'depreciation': depreciation_figure
+}
+
+
+class CachedFigure:
+    def __init__(self, fig):
+        # Plain dict for Dash props, JSON bytes + ETag for HTTP clients
+        slim_template(fig)
+        self.figure = fig.to_plotly_json()
+        self.json = pio.to_json(fig, validate=False).encode('utf-8')
+        self.etag = hashlib.sha1(self.json).hexdigest()
+
+
+class FigureCache:
+    """Market figures keyed by name, rebuilt when the aggregates change."""
+
+    def __init__(self, store, builders=MARKET_FIGURES):
+        self.store = store
+        self.builders = builders
+        self._lock = threading.Lock()
+        self._version = object()
+        self._figures = {}
+
+    def get(self, name):
+        aggregates = self.store.get()
+        if aggregates.version != self._version:
+            with self._lock:
+                if aggregates.version != self._version:
+                    self._figures = {key: self._build(key, build, aggregates) for key, build in self.builders.items()}
+                    self._version = aggregates.version
+        return self._figures[name]
+
+    def _build(self, key, build, aggregates):
+        with metrics.stage(key, 'figure_build'):
+            fig = build(aggregates)
+        with metrics.stage(key, 'serialization'):
+            return CachedFigure(fig)
+
+    def version(self):
+        # Opaque token that changes whenever the figures are rebuilt
+        self.get(self.names()[0])
+        return str(self._version)
+
+    def names(self):
+        return list(self.builders)
@@ -0,0 +1,39 @@
+# gunicorn.conf.py
+# Load the app in the master and fork workers that share it copy-on-write
+import gc
+import os
+
+from execution import available_cpus
+from memstats import process_memory
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+# One worker per core this process may use: a cpuset-limited container gets
+# its share, not the host's core count, matching ExecutionPolicy's budget
+workers = int(os.environ.get('WEB_CONCURRENCY', available_cpus()))
+# The app sizes its inference thread budget from the worker count
+os.environ['WEB_CONCURRENCY'] = str(workers)
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach; otherwise
+    # the first GC pass in each worker writes to every object header and
+    # un-shares those pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
+
+
+def post_worker_init(worker):
+    mem = process_memory()
+    worker.log.info("worker %s memory: %s", worker.pid, mem)
+
+
+def when_ready(server):
+    # Collect once and stop automatic collection until the workers are forked
+    gc.collect()
+    gc.disable()
+    server.log.info("master memory after preload: %s", process_memory())
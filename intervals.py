@@ -0,0 +1,168 @@
+# intervals.py
+# Residual-based (split conformal) price ranges, calibrated once per dataset and model version
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+
+from utils import FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Share of listings whose price should fall inside the displayed range
+INTERVAL_COVERAGE = 0.8
+
+# Calibration bins over the predicted price; cheap cars have proportionally
+# wider errors than expensive ones, so one global band would be wrong at both ends
+INTERVAL_BINS = 10
+
+
+class PriceIntervals:
+    """Lookup table from predicted price to a price range.
+
+    `edges` splits the predicted price into bins; for each bin `lower` and
+    `upper` are conformal quantiles of actual / predicted price. Serving an
+    interval is one searchsorted and two multiplies, with no extra model call.
+    """
+
+    def __init__(self, edges, lower, upper, coverage, counts):
+        self.edges = np.asarray(edges, dtype='float64')
+        self.lower = np.asarray(lower, dtype='float64')
+        self.upper = np.asarray(upper, dtype='float64')
+        self.coverage = coverage
+        self.counts = counts
+
+    @classmethod
+    def calibrate(cls, predicted, actual, coverage=INTERVAL_COVERAGE, bins=INTERVAL_BINS):
+        predicted = np.asarray(predicted, dtype='float64')
+        actual = np.asarray(actual, dtype='float64')
+        known = np.isfinite(actual) & np.isfinite(predicted) & (predicted > 0)
+        predicted, ratio = predicted[known], actual[known] / predicted[known]
+
+        # Interior bin edges at the quantiles of the predicted price
+        edges = np.unique(np.quantile(predicted, np.linspace(0, 1, bins + 1))[1:-1])
+        bin_of = np.searchsorted(edges, predicted, side='right')
+
+        alpha = 1 - coverage
+        lower, upper, counts = [], [], []
+        for b in range(len(edges) + 1):
+            r = ratio[bin_of == b]
+            n = len(r)
+            # Finite-sample conformal levels for each tail: (n + 1)-corrected ranks
+            lo = max(math.floor((n + 1) * alpha / 2) - 1, 0)
+            hi = min(math.ceil((n + 1) * (1 - alpha / 2)) - 1, n - 1)
+            r = np.sort(r)
+            lower.append(r[lo] if n else 1.0)
+            upper.append(r[hi] if n else 1.0)
+            counts.append(n)
+        return cls(edges, lower, upper, coverage, counts)
+
+    def bounds(self, predictions):
+        # Vectorized: arrays of low and high prices for an array of predictions
+        predictions = np.asarray(predictions, dtype='float64')
+        b = np.searchsorted(self.edges, predictions, side='right')
+        return predictions * self.lower[b], predictions * self.upper[b]
+
+    def interval(self, prediction):
+        b = int(np.searchsorted(self.edges, prediction, side='right'))
+        return prediction * float(self.lower[b]), prediction * float(self.upper[b])
+
+    def empirical_coverage(self, predicted, actual):
+        low, high = self.bounds(predicted)
+        actual = np.asarray(actual, dtype='float64')
+        return float(np.mean((actual >= low) & (actual <= high)))
+
+
+class IntervalCache:
+    """PriceIntervals for the current dataset and model, recalibrated off the request path.
+
+    `predict_frame` scores the dataset's feature columns in one vectorized
+    call; `model_version()` (optional) names the serving model. Only the
+    very first table is built on the caller's thread. After that a changed
+    dataset or model starts `refresh()` in a background thread and `get()`
+    keeps serving the old table until the new one is ready. The model
+    registry calls `calibrate(model)` in its reload thread before a new
+    version goes live, so a swap normally finds its table already built.
+    The calibration rows are the listings the model was trained on, so the
+    coverage is in-sample; a held-out file can be passed as the store instead.
+    """
+
+    def __init__(self, store, predict_frame, coverage=INTERVAL_COVERAGE, bins=INTERVAL_BINS, model_version=None):
+        self.store = store
+        self.predict_frame = predict_frame
+        self.model_version = model_version or (lambda: None)
+        self.coverage = coverage
+        self.bins = bins
+        self._lock = threading.Lock()  # one calibration at a time
+        self._version = None
+        self._intervals = None
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self.calibrations = 0
+        self.last_calibration_ms = None
+
+    @property
+    def ready(self):
+        return self._intervals is not None
+
+    def calibrate(self, model=None):
+        # Build and install the table for the current dataset and `model`
+        # (a registry ModelVersion; the serving model by default)
+        with self._lock:
+            aggregates = self.store.get()
+            version = (aggregates.version, model.version if model is not None else self.model_version())
+            if version == self._version:
+                return self._intervals
+            predict_frame = model.predict_frame if model is not None else self.predict_frame
+            t0 = time.perf_counter()
+            df = self.store.df
+            predicted = predict_frame(df[FEATURE_COLUMNS])
+            intervals = PriceIntervals.calibrate(predicted, df['price_usd'], self.coverage, self.bins)
+            self._intervals, self._version = intervals, version
+            self.calibrations += 1
+            self.last_calibration_ms = (time.perf_counter() - t0) * 1000
+        return intervals
+
+    def refresh(self):
+        # Recalibrate in a background thread (at most one at a time)
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name='interval-calibration', daemon=True).start()
+
+    def _refresh(self):
+        try:
+            self.calibrate()
+        except Exception:
+            logger.exception("recalibrating price intervals failed; keeping the previous table")
+        finally:
+            self._refreshing = False
+
+    def get(self):
+        intervals = self._intervals
+        if intervals is None:
+            return self.calibrate()
+        if (self.store.get().version, self.model_version()) != self._version:
+            self.refresh()
+        return intervals
+
+    def interval(self, prediction):
+        return self.get().interval(prediction)
+
+    def stats(self):
+        intervals = self._intervals
+        if intervals is None:
+            return {'calibrated': False}
+        return {
+            'calibrated': True,
+            'calibrations': self.calibrations,
+            'last_calibration_ms': round(self.last_calibration_ms, 1),
+            'coverage': intervals.coverage,
+            'bin_edges': [round(e, 2) for e in intervals.edges.tolist()],
+            'lower_ratio': [round(r, 4) for r in intervals.lower.tolist()],
+            'upper_ratio': [round(r, 4) for r in intervals.upper.tolist()],
+            'calibration_rows': intervals.counts
+        }
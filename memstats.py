@@ -0,0 +1,30 @@
+# memstats.py
+# Per-process memory breakdown, used to check copy-on-write sharing across workers
+import os
+import resource
+
+
+def process_memory(pid='self'):
+    """Resident, proportional and unique set sizes in kB.
+
+    USS (private pages) is what each extra worker really costs; pages still
+    shared with the preloading master only count towards RSS/PSS. Falls back
+    to peak RSS where /proc/<pid>/smaps_rollup is unavailable.
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        return {'pid': os.getpid(), 'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+    return {
+        'pid': os.getpid() if pid == 'self' else int(pid),
+        'rss_kb': fields.get('Rss', 0),
+        'pss_kb': fields.get('Pss', 0),
+        'uss_kb': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+        'shared_kb': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+    }
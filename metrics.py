@@ -0,0 +1,125 @@
+# metrics.py
+# Latency histograms for each stage of the Dash callbacks, rendered in the
+# Prometheus text format at /metrics
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from flask import g, has_request_context
+
+# METRICS_ENABLED=0 turns every timer below into a no-op
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+
+# Upper bounds in seconds (Prometheus `le`), from sub-millisecond model calls
+# up to multi-second figure rebuilds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_NULL_STAGE = nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Histograms of seconds spent per (callback, stage).
+
+    Stage names are free-form (app.py uses validation, scoring, feature_prep,
+    inference, figure_build, ...); `timed()` adds total (the function) and,
+    for the callback Dash dispatched, serialization and request (the whole
+    /_dash-update-component request). When disabled, `stage()` returns a
+    shared null context and `timed()` returns the function unchanged.
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED, buckets=LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}  # (callback, stage) -> Histogram
+
+    def observe(self, callback, stage, seconds):
+        key = (callback, stage)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def _timed_stage(self, callback, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(callback, stage, time.perf_counter() - t0)
+
+    def stage(self, callback, stage):
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._timed_stage(callback, stage)
+
+    def timed(self, callback):
+        """Decorator recording the function's total time under `callback`.
+
+        The outermost timed function of a request also names the request, so
+        the time Dash then spends serializing its return value is recorded as
+        that callback's serialization stage (see register_metrics in api.py).
+        """
+        def decorator(fn):
+            if not self.enabled:
+                return fn
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                outermost = has_request_context() and 'metrics_callback' not in g
+                if outermost:
+                    g.metrics_callback = callback
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    now = time.perf_counter()
+                    self.observe(callback, 'total', now - t0)
+                    if outermost:
+                        g.metrics_callback_done = now
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: (list(h.counts), h.sum, h.count)
+                for key, h in sorted(self._histograms.items())
+            }
+
+    def render(self, name='dash_callback_stage_seconds'):
+        # Prometheus text exposition format (cumulative buckets)
+        lines = [
+            f"# HELP {name} Time spent in each stage of a Dash callback.",
+            f"# TYPE {name} histogram"
+        ]
+        bounds = [repr(float(b)) for b in self.buckets] + ['+Inf']
+        for (callback, stage), (counts, total, count) in self.snapshot().items():
+            labels = f'callback="{callback}",stage="{stage}"'
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {total!r}')
+            lines.append(f'{name}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
@@ -0,0 +1,187 @@
+# profiling.py
+# Opt-in profiling of single requests: cProfile dumps or sampled stacks in the
+# collapsed format flame graph tools read, stored for download
+import cProfile
+import hmac
+import itertools
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), 'car-app-profiles')
+
+# The switch interval is process-wide, so overlapping sampling sessions
+# share one override: the first saves the default, the last restores it
+_switch_lock = threading.Lock()
+_switch_users = 0
+_switch_default = None
+
+
+def shorten_switch_interval(interval):
+    global _switch_users, _switch_default
+    with _switch_lock:
+        if _switch_users == 0:
+            _switch_default = sys.getswitchinterval()
+        _switch_users += 1
+        sys.setswitchinterval(min(sys.getswitchinterval(), interval))
+
+
+def restore_switch_interval():
+    global _switch_users
+    with _switch_lock:
+        _switch_users -= 1
+        if _switch_users == 0:
+            sys.setswitchinterval(_switch_default)
+
+
+class CProfileSession:
+    # Deterministic profile of the request thread; open with pstats or snakeviz
+    suffix = '.prof'
+
+    def __init__(self, interval=None):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path):
+        self.profile.dump_stats(path)
+
+
+class SamplingSession:
+    # Stacks of the request thread every `interval` seconds, written as
+    # "outer;inner count" lines (flamegraph.pl, speedscope, inferno)
+    suffix = '.collapsed'
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.target = threading.get_ident()
+        # The sampler only runs when it gets the GIL, so hand it over more
+        # often than the default 5 ms while sampling
+        shorten_switch_interval(interval)
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        restore_switch_interval()
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+PROFILE_MODES = {'cprofile': CProfileSession, 'sample': SamplingSession}
+
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps the last `keep` profiles.
+
+    A request is profiled when it carries `X-Profile: <token>` (mode from
+    `X-Profile-Mode`, cprofile by default), or at random with probability
+    `sample_rate` for Dash callback requests. Profiles can only be
+    downloaded with the token, so sampling without one is refused (with a
+    warning) rather than filling the directory. With no token the profiler
+    is disabled and no hooks are installed.
+    """
+
+    def __init__(self, token=None, sample_rate=0.0, directory=PROFILE_DIR, keep=50, interval=0.001):
+        self.token = token or None
+        self.sample_rate = float(sample_rate or 0)
+        if self.sample_rate > 0 and self.token is None:
+            logger.warning("PROFILE_SAMPLE_RATE is set without PROFILE_TOKEN; sampled profiles "
+                           "could never be downloaded, so sampling is off")
+            self.sample_rate = 0.0
+        self.directory = directory
+        self.keep = keep
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self.captured = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            token=os.environ.get('PROFILE_TOKEN'),
+            sample_rate=os.environ.get('PROFILE_SAMPLE_RATE', 0),
+            directory=os.environ.get('PROFILE_DIR', PROFILE_DIR),
+            keep=int(os.environ.get('PROFILE_KEEP', 50))
+        )
+
+    @property
+    def enabled(self):
+        return self.token is not None or self.sample_rate > 0
+
+    def authorized(self, req):
+        # The token only travels in a header, never in a URL that ends up in logs
+        supplied = req.headers.get('X-Profile')
+        return (
+            self.token is not None and supplied is not None
+            and hmac.compare_digest(supplied.encode('utf-8'), self.token.encode('utf-8'))
+        )
+
+    def requested_mode(self, req):
+        # Profiling mode for this request, or None
+        if req.path.startswith('/api/profiles'):
+            return None
+        if self.authorized(req):
+            mode = req.headers.get('X-Profile-Mode', 'cprofile')
+            return mode if mode in PROFILE_MODES else 'cprofile'
+        if self.sample_rate > 0 and req.path.endswith('/_dash-update-component') and random.random() < self.sample_rate:
+            return 'cprofile'
+        return None
+
+    def start(self, mode):
+        return PROFILE_MODES[mode](self.interval)
+
+    def active(self):
+        # True inside a request that is being profiled
+        return self.enabled and has_request_context() and 'profile_session' in g
+
+    def save(self, session, label):
+        os.makedirs(self.directory, exist_ok=True)
+        label = re.sub(r'[^A-Za-z0-9_.-]+', '-', label).strip('-') or 'request'
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._sequence):05d}-{label}{session.suffix}"
+        session.write(os.path.join(self.directory, name))
+        with self._lock:
+            self.captured += 1
+            for old in self.names()[self.keep:]:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except OSError:
+                    pass
+        return name
+
+    def names(self):
+        # Stored profiles, newest first
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(('.prof', '.collapsed'))]
+        except OSError:
+            return []
+        return sorted(names, reverse=True)
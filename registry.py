@@ -0,0 +1,245 @@
+# registry.py
+# The serving model, reloaded in the background and swapped in atomically when
+# a new version is deployed (no worker restart needed)
+import glob
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from bundle import BUNDLE_SUFFIX, is_bundle, read_manifest
+from fast_predict import CompiledPredictor, compile_pipeline
+from metrics import metrics
+from schema import INPUT_SCHEMA
+from startup import LazyResource
+from utils import make_feature_frame
+
+logger = logging.getLogger(__name__)
+
+# Largest |compiled - pipeline| difference accepted by the warm-up check
+PARITY_TOLERANCE = 1e-3
+
+
+def warmup_records():
+    # Form defaults plus the low and high end of every input
+    records = [{f.name: f.default for f in INPUT_SCHEMA.fields}]
+    for end in ('minimum', 'maximum'):
+        record = {}
+        for i, f in enumerate(INPUT_SCHEMA.fields):
+            if f.numeric:
+                record[f.name] = getattr(f, end)
+            else:
+                record[f.name] = f.categories[(i if end == 'maximum' else 0) % len(f.categories)]
+        records.append(record)
+    return records
+
+
+class ModelVersion:
+    """One loaded model: the fitted pipeline, its compiled fast path and where it came from.
+
+    Requests hold on to the ModelVersion they started with, so a swap never
+    changes the model under an in-flight prediction.
+    """
+
+    def __init__(self, version, path, pipeline, compiled):
+        self.version = version
+        self.path = path
+        self.pipeline = pipeline
+        self.compiled = compiled
+        self.loaded_at = time.time()
+
+    def predict(self, X):
+        return self.pipeline.predict(X)
+
+    def predict_frame(self, df):
+        if self.compiled is None:
+            return self.pipeline.predict(df)
+        return self.compiled.predict(df)
+
+    def predict_records(self, records):
+        # Only the predict callback (via the micro-batcher) scores records
+        if self.compiled is None:
+            with metrics.stage('predict', 'feature_prep'):
+                X = make_feature_frame(records)
+            with metrics.stage('predict', 'inference'):
+                return self.pipeline.predict(X)
+        with metrics.stage('predict', 'feature_prep'):
+            X = self.compiled.encode_records(records)
+        with metrics.stage('predict', 'inference'):
+            return self.compiled.predict_encoded(X)
+
+
+class ModelRegistry:
+    """Watches a model artifact (or a directory of versioned ones) and serves the newest.
+
+    `source` is a .pkl file, whose version is a hash of its contents, a
+    model bundle (see bundle.py), whose manifest carries its version, or a
+    directory of either, where the last *.pkl / *.bundle by name wins and
+    its name is the version. The source is stat'ed at most every `check_interval`
+    seconds (0 disables reloading); a change is loaded in a background
+    thread, warmed up and parity-checked against the compiled fast path,
+    and only then swapped in. A candidate that fails to load or predict is
+    logged and the current version keeps serving. `on_swap` callbacks get
+    each reloaded ModelVersion in the reload thread just before it goes
+    live, so follow-up work (recalibrating price intervals) is done by the
+    time requests see it; a failing callback is logged and the swap goes on.
+    """
+
+    def __init__(self, source, load, configure=None, check_interval=5.0, lazy=False):
+        self.source = source
+        self._load = load
+        self._configure = configure
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._current = None
+        self._stamp = None
+        self._loading = None  # pid of the process running a reload
+        self._next_check = time.monotonic() + check_interval
+        self._listeners = []
+        self.swaps = 0
+        self.failed_loads = 0
+        self.last_error = None
+        self._initial = LazyResource('model', self._load_initial, lazy=lazy)
+
+    def _versioned_dir(self):
+        return os.path.isdir(self.source) and not is_bundle(self.source)
+
+    def _locate(self):
+        # (path of the newest model, stat stamp of the source)
+        if self._versioned_dir():
+            paths = sorted(
+                glob.glob(os.path.join(self.source, '*.pkl'))
+                + [p for p in glob.glob(os.path.join(self.source, '*' + BUNDLE_SUFFIX)) if is_bundle(p)],
+                key=os.path.basename
+            )
+            if not paths:
+                raise FileNotFoundError(f"No *.pkl or *{BUNDLE_SUFFIX} models in {self.source}")
+            path = paths[-1]
+        else:
+            path = self.source
+        # A bundle's manifest is written last, so it stands in for the whole bundle
+        st = os.stat(os.path.join(path, 'manifest.json') if is_bundle(path) else path)
+        return path, (path, st.st_mtime_ns, st.st_size)
+
+    def _version_of(self, path):
+        if self._versioned_dir():
+            return os.path.splitext(os.path.basename(path))[0]
+        if is_bundle(path):
+            return read_manifest(path)['version']
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()[:12]
+
+    def _build(self, path):
+        pipeline = self._load(path)
+        if self._configure is not None:
+            pipeline = self._configure(pipeline)
+        # A bundle loads straight into the compiled predictor, which also
+        # accepts frames, so it serves both paths
+        compiled = pipeline if isinstance(pipeline, CompiledPredictor) else compile_pipeline(pipeline)
+
+        # Warm up both paths and make sure they agree before serving anything
+        records = warmup_records()
+        expected = pipeline.predict(make_feature_frame(records))
+        if not np.all(np.isfinite(expected)):
+            raise ValueError(f"Model at {path} produced non-finite predictions")
+        if compiled is not None:
+            diff = float(np.max(np.abs(compiled.predict_records(records) - expected)))
+            if diff > PARITY_TOLERANCE:
+                logger.warning("compiled predictor for %s differs by %s; using the pipeline", path, diff)
+                compiled = None
+        return ModelVersion(self._version_of(path), path, pipeline, compiled)
+
+    def _load_initial(self):
+        path, stamp = self._locate()
+        self._swap(self._build(path), stamp)
+
+    def _swap(self, model, stamp):
+        # The initial load has nothing to swap out; listeners registered
+        # after it handle the first model on first use
+        if self._current is not None:
+            for listener in self._listeners:
+                try:
+                    listener(model)
+                except Exception:
+                    logger.exception("on_swap listener %r failed for model %s", listener, model.version)
+        with self._lock:
+            previous = self._current
+            self._current = model
+            self._stamp = stamp
+        if previous is not None:
+            self.swaps += 1
+            logger.info("model swapped: %s -> %s", previous.version, model.version)
+
+    def _reload(self, path, stamp):
+        try:
+            self._swap(self._build(path), stamp)
+        except Exception as e:
+            logger.exception("loading model %s failed; keeping %s", path, self._current.version)
+            self.failed_loads += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            # Don't retry the same file until it changes again
+            with self._lock:
+                self._stamp = stamp
+        finally:
+            self._loading = None
+
+    def check(self):
+        """Start loading a new version if the source changed; returns True if a load started."""
+        try:
+            path, stamp = self._locate()
+        except OSError:
+            return False
+        with self._lock:
+            # A reload thread started before a fork doesn't exist in the child
+            if stamp == self._stamp or self._loading == os.getpid():
+                return False
+            self._loading = os.getpid()
+        threading.Thread(target=self._reload, args=(path, stamp), name='model-reload', daemon=True).start()
+        return True
+
+    def on_swap(self, listener):
+        self._listeners.append(listener)
+
+    @property
+    def ready(self):
+        return self._initial.ready
+
+    @property
+    def error(self):
+        return self._initial.error
+
+    def current(self):
+        self._initial.get()
+        if self.check_interval:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + self.check_interval
+                self.check()
+        return self._current
+
+    @property
+    def version(self):
+        return self.current().version
+
+    @property
+    def path(self):
+        return self.current().path
+
+    def predict(self, X):
+        return self.current().predict(X)
+
+    def stats(self):
+        model = self._current
+        return {
+            'version': model.version if model else None,
+            'path': model.path if model else None,
+            'compiled': model.compiled is not None if model else None,
+            'loaded_at': model.loaded_at if model else None,
+            'swaps': self.swaps,
+            'reloading': self._loading == os.getpid(),
+            'failed_loads': self.failed_loads,
+            'last_error': self.last_error
+        }
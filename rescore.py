@@ -0,0 +1,124 @@
+# rescore.py
+# Offline bulk re-pricing of a listings CSV, streamed in chunks with bounded memory
+#
+#   python rescore.py inventory.csv priced.csv --chunksize 50000 --workers 4
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import bundle
+from execution import ExecutionPolicy
+from schema import INPUT_SCHEMA
+
+DEFAULT_MODEL_PATH = 'car_price_model_pipeline.pkl'
+
+# Model loaded once per pool worker
+_worker_model = None
+
+
+def load_model(model_path, threads=None):
+    # A pickled pipeline or a pickle-free bundle (see bundle.py)
+    model_pipeline = bundle.load_model(model_path)
+    if threads is not None:
+        ExecutionPolicy(threads=threads).apply().configure_model(model_pipeline)
+    return model_pipeline
+
+
+def score_frame(model_pipeline, chunk):
+    # Input columns plus predicted_price, with a per-row error for rows that fail validation
+    input_data, errors = INPUT_SCHEMA.validate_frame(chunk)
+    prices = np.full(len(chunk), np.nan)
+    if len(input_data):
+        prices[pd.isnull(errors)] = model_pipeline.predict(input_data)
+    return chunk.assign(predicted_price=np.round(prices, 2), error=errors)
+
+
+def _init_worker(model_path, threads):
+    global _worker_model
+    _worker_model = load_model(model_path, threads)
+
+
+def _score_in_worker(chunk):
+    return score_frame(_worker_model, chunk)
+
+
+def iter_scored(reader, model_path, policy):
+    """Yield scored chunks in input order.
+
+    With policy.processes > 1 chunks are scored in a process pool (each
+    process limited to policy.pool_threads threads), keeping at most two
+    chunks per worker in flight so memory stays bounded.
+    """
+    workers = policy.processes
+    if workers <= 1:
+        model_pipeline = load_model(model_path, policy.threads)
+        for chunk in reader:
+            yield score_frame(model_pipeline, chunk)
+        return
+
+    initargs = (model_path, policy.pool_threads)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+        in_flight = deque()
+        for chunk in reader:
+            in_flight.append(pool.submit(_score_in_worker, chunk))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def rescore(input_path, output_path, model_path=DEFAULT_MODEL_PATH, chunksize=50000, workers=None,
+            log=sys.stderr, threads=None):
+    # By default every core is used: one single-threaded process per core, or
+    # the cores split evenly between `workers` processes
+    policy = ExecutionPolicy.auto(processes=workers)
+    if threads:
+        policy.threads = policy.pool_threads = threads
+    per_process = policy.pool_threads if policy.processes > 1 else policy.threads
+    print(f"scoring with {policy.processes} process(es) x {per_process} thread(s) on {policy.cpus} cpu(s)", file=log)
+
+    reader = pd.read_csv(input_path, chunksize=chunksize)
+    out = sys.stdout if output_path == '-' else open(output_path, 'w', newline='')
+
+    rows = failed = 0
+    started = time.perf_counter()
+    try:
+        for i, scored in enumerate(iter_scored(reader, model_path, policy)):
+            scored.to_csv(out, index=False, header=(i == 0))
+            rows += len(scored)
+            failed += int(scored['error'].notna().sum())
+            elapsed = time.perf_counter() - started
+            print(f"{rows:,} rows scored ({rows / elapsed:,.0f} rows/s)", file=log)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"done: {rows:,} rows ({failed:,} invalid) in {elapsed:.1f}s, "
+          f"{rows / elapsed if elapsed else 0:,.0f} rows/s", file=log)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-price a listings CSV with the trained model.')
+    parser.add_argument('input', help='CSV with the same columns as used_car_price_dataset_extended.csv')
+    parser.add_argument('output', help="where to write the priced CSV ('-' for stdout)")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help='pickled model pipeline or model bundle')
+    parser.add_argument('--chunksize', type=int, default=50000, help='rows read and scored at a time')
+    parser.add_argument('--workers', type=int, default=None, help='score chunks in this many processes (default: one per cpu)')
+    parser.add_argument('--threads', type=int, default=None, help='model threads per process (default: cpus / workers)')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"no such file: {args.input}")
+    rescore(args.input, args.output, args.model, args.chunksize, args.workers, threads=args.threads)
+
+
+if __name__ == '__main__':
+    main()
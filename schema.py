@@ -0,0 +1,161 @@
+# schema.py
+# Declarative description of the eleven model inputs, shared by the Dash form and the API
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils import NUMERIC_CASTS
+
+
+class Field:
+    """One model input: dtype, allowed range or categories, and its form control."""
+
+    def __init__(self, name, input_id, label, dtype, default, minimum=None, maximum=None,
+                 step=None, categories=None, placeholder=None, nullable=False):
+        self.name = name
+        self.input_id = input_id
+        self.label = label
+        self.dtype = dtype
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+        self.categories = categories
+        self.placeholder = placeholder
+        # Whether the API may omit the value (the pipeline imputes it)
+        self.nullable = nullable
+
+    @property
+    def numeric(self):
+        return self.dtype in NUMERIC_CASTS
+
+    def coerce(self, value, allow_missing=False):
+        # Returns (typed value, error message or None)
+        if value is None or value == '' or (isinstance(value, float) and math.isnan(value)):
+            if allow_missing and self.nullable:
+                return None, None
+            return None, f"{self.label} is required"
+
+        if not self.numeric:
+            value = str(value)
+            if self.categories is not None and value not in self.categories:
+                return None, f"{self.label} must be one of {', '.join(self.categories)}"
+            return value, None
+
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None, f"{self.label} must be a number"
+        if math.isnan(number):
+            return None, f"{self.label} must be a number"
+        if self.dtype == 'int64':
+            if not number.is_integer():
+                return None, f"{self.label} must be a whole number"
+            number = int(number)
+        if (self.minimum is not None and number < self.minimum) or (self.maximum is not None and number > self.maximum):
+            return None, f"{self.label} must be between {self.minimum} and {self.maximum}"
+        return number, None
+
+    def input_props(self):
+        # Keyword arguments for the dcc.Input of a numeric field
+        props = {'id': self.input_id, 'type': 'number', 'placeholder': self.placeholder,
+                 'value': self.default, 'min': self.minimum, 'max': self.maximum}
+        if self.step is not None:
+            props['step'] = self.step
+        return props
+
+    def dropdown_props(self):
+        # Keyword arguments for the dcc.Dropdown of a categorical field
+        return {'id': self.input_id, 'value': self.default,
+                'options': [{'label': c, 'value': c} for c in self.categories]}
+
+
+class InputSchema:
+    def __init__(self, fields):
+        self.fields = fields
+        self.by_name = {f.name: f for f in fields}
+
+    def __getitem__(self, name):
+        return self.by_name[name]
+
+    @property
+    def columns(self):
+        return [f.name for f in self.fields]
+
+    def validate(self, values, allow_missing=False):
+        """Validate and coerce one listing in a single pass.
+
+        Returns the typed record (ready for the compiled predictor or
+        utils.make_feature_frame) and a list of error messages.
+        """
+        record, errors = {}, []
+        for f in self.fields:
+            value, error = f.coerce(values.get(f.name), allow_missing)
+            if error:
+                errors.append(error)
+            record[f.name] = value
+        return record, errors
+
+    def validate_frame(self, df, allow_missing=True):
+        """Vectorized validation of a batch of listings.
+
+        Returns the typed frame of valid rows and an array of per-row error
+        messages (None for rows that can be scored). Raises ValueError when
+        whole columns are missing.
+        """
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+        errors = np.full(len(df), None, dtype=object)
+        typed = {}
+
+        def flag(bad, message):
+            errors[bad & pd.isnull(errors)] = message
+
+        for f in self.fields:
+            raw = df[f.name]
+            absent = raw.isna().to_numpy()
+            if not (allow_missing and f.nullable):
+                flag(absent, f"{f.label} is required")
+
+            if f.numeric:
+                values = pd.to_numeric(raw, errors='coerce').to_numpy(dtype='float64')
+                flag(~absent & np.isnan(values), f"{f.label} must be a number")
+                known = ~np.isnan(values)
+                if f.dtype == 'int64':
+                    flag(known & (values != np.round(values)), f"{f.label} must be a whole number")
+                if f.minimum is not None:
+                    flag(known & ((values < f.minimum) | (values > f.maximum)),
+                         f"{f.label} must be between {f.minimum} and {f.maximum}")
+            else:
+                values = raw.astype('object')
+                values = values.where(absent, values.astype('str')).to_numpy()
+                if f.categories is not None:
+                    flag(~absent & ~np.isin(values, f.categories), f"{f.label} must be one of {', '.join(f.categories)}")
+            typed[f.name] = values
+
+        valid = pd.isnull(errors)
+        input_data = pd.DataFrame({name: values[valid] for name, values in typed.items()})
+        for f in self.fields:
+            if f.numeric:
+                input_data[f.name] = input_data[f.name].astype(f.dtype)
+        return input_data, errors
+
+
+# Bounds and options mirror the training data (1995-2023, 800-5000cc, ...)
+INPUT_SCHEMA = InputSchema([
+    Field('make_year', 'input1', 'Make Year', 'int64', 2018, minimum=1995, maximum=2023, placeholder='e.g., 2018'),
+    Field('mileage_kmpl', 'input2', 'Mileage (kmpl)', 'float64', 15, minimum=5, maximum=35, step=0.1, placeholder='e.g., 15.5'),
+    Field('engine_cc', 'input3', 'Engine CC', 'int64', 1500, minimum=800, maximum=5000, placeholder='e.g., 1500'),
+    Field('owner_count', 'input5', 'Previous Owners', 'int64', 1, minimum=1, maximum=5, placeholder='e.g., 1'),
+    Field('accidents_reported', 'input9', 'Accidents Reported', 'int64', 0, minimum=0, maximum=5, placeholder='e.g., 0'),
+    Field('fuel_type', 'input4', 'Fuel Type', 'str', 'Petrol', categories=['Petrol', 'Diesel', 'Electric']),
+    Field('brand', 'input6', 'Brand', 'str', 'Chevrolet',
+          categories=['Chevrolet', 'Honda', 'BMW', 'Hyundai', 'Nissan', 'Tesla', 'Toyota', 'Kia', 'Volkswagen', 'Ford']),
+    Field('transmission', 'input7', 'Transmission', 'str', 'Manual', categories=['Manual', 'Automatic']),
+    Field('color', 'input8', 'Color', 'str', 'White', categories=['White', 'Silver', 'Black', 'Red', 'Blue', 'Gray']),
+    Field('service_history', 'input10', 'Service History', 'str', 'Full', categories=['Full', 'Partial'], nullable=True),
+    Field('insurance_valid', 'input11', 'Insurance Valid', 'str', 'Yes', categories=['Yes', 'No'])
+])
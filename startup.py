@@ -0,0 +1,117 @@
+# startup.py
+# Startup timing report and background loading of heavy resources
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# LAZY_STARTUP=1 brings the server up before the model and dataset are loaded
+LAZY_STARTUP = os.environ.get('LAZY_STARTUP', '0') == '1'
+
+
+class StartupTimer:
+    """Wall-clock time of each import and load step since process start."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.steps = []  # (name, seconds, thread name)
+        self.marks = {}  # name -> seconds since start
+
+    @contextmanager
+    def step(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self.steps.append((name, elapsed, threading.current_thread().name))
+            logger.info("startup: %s took %.1f ms", name, elapsed * 1000)
+
+    def mark(self, name):
+        with self._lock:
+            self.marks[name] = time.perf_counter() - self.started
+
+    def report(self):
+        with self._lock:
+            steps = list(self.steps)
+            marks = dict(self.marks)
+        return {
+            'since_start_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'marks_ms': {name: round(seconds * 1000, 1) for name, seconds in marks.items()},
+            'steps': [
+                {'step': name, 'ms': round(seconds * 1000, 1), 'thread': thread}
+                for name, seconds, thread in steps
+            ]
+        }
+
+
+startup_timer = StartupTimer()
+
+
+class LazyResource:
+    """A value loaded once, either in a background thread or on first use.
+
+    `get()` blocks until the value is available and re-raises the loader's
+    error if loading failed. Without `lazy` the value is loaded in the
+    constructor and a failure is raised right there, so a bad model or
+    dataset path fails the import instead of the first request. A process
+    forked while loading was still in progress starts its own load, since
+    the loading thread doesn't survive the fork.
+    """
+
+    def __init__(self, name, load, lazy=LAZY_STARTUP):
+        self.name = name
+        self._load = load
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._value = None
+        self.error = None
+        self._pid = None
+        if lazy:
+            self.start()
+        else:
+            self._run(raise_errors=True)
+
+    @property
+    def ready(self):
+        # A process forked mid-load starts its own load when first asked
+        if not self._done.is_set() and self._pid != os.getpid():
+            self.start()
+        return self._done.is_set() and self.error is None
+
+    def start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._done = threading.Event()
+        threading.Thread(target=self._run, name=f'load-{self.name}', daemon=True).start()
+
+    def _run(self, raise_errors=False):
+        self._pid = os.getpid()
+        try:
+            with startup_timer.step(f'load {self.name}'):
+                self._value = self._load()
+            self.error = None
+        except Exception as e:
+            self.error = e
+            if raise_errors:
+                raise
+            logger.exception("loading %s failed", self.name)
+        finally:
+            self._done.set()
+
+    def get(self, timeout=None):
+        if not self._done.is_set() and self._pid != os.getpid():
+            self.start()
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} is still loading")
+        if self.error is not None:
+            raise self.error
+        return self._value
+
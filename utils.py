@@ -1,7 +1,39 @@
 # utils.py
 from datetime import datetime
 
-def add_car_age(df):
-    df = df.copy()
-    df['car_age'] = datetime.now().year - df['make_year']
+import pandas as pd
+
+# Model input columns and the dtypes the pipeline was trained on
+NUMERIC_FEATURES = {
+    'make_year': 'int64',
+    'mileage_kmpl': 'float64',
+    'engine_cc': 'int64',
+    'owner_count': 'int64',
+    'accidents_reported': 'int64'
+}
+CATEGORICAL_FEATURES = ['fuel_type', 'brand', 'transmission', 'color', 'service_history', 'insurance_valid']
+FEATURE_COLUMNS = list(NUMERIC_FEATURES) + CATEGORICAL_FEATURES
+
+# Python type for each numeric dtype, for casting single values the same way
+NUMERIC_CASTS = {'int64': int, 'float64': float}
+
+def make_feature_frame(records):
+    # Build one model input frame from listing dicts, cast to the training dtypes
+    input_data = pd.DataFrame.from_records(records, columns=FEATURE_COLUMNS)
+    return input_data.astype({**NUMERIC_FEATURES, **{col: 'str' for col in CATEGORICAL_FEATURES}})
+
+# Reference year for car_age, read once; call refresh_reference_year() to roll it over
+_reference_year = datetime.now().year
+
+def refresh_reference_year(year=None):
+    global _reference_year
+    _reference_year = year if year is not None else datetime.now().year
+    return _reference_year
+
+def add_car_age(df, as_of_year=None):
+    # Shallow copy: only the new column is allocated, the caller's frame is untouched.
+    # The fitted pipeline's ColumnTransformer drops car_age, so the year
+    # used here doesn't change predictions.
+    df = df.copy(deep=False)
+    df['car_age'] = (as_of_year if as_of_year is not None else _reference_year) - df['make_year']
     return df
@@ -0,0 +1,23 @@
+# wsgi.py
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:server
+#
+# With preload_app the master imports this module once, so the model and the
+# memory-mapped dataset are loaded before fork and shared copy-on-write by
+# every worker. A model hot-swapped later is loaded by each worker on its own.
+from api import register_stats
+from app import (server, model_registry, figure_cache, market_store, price_intervals, comparables,
+                 response_compressor)
+from memstats import process_memory
+
+# Touch everything that is built lazily so it happens once, in the master
+market_store.get()
+figure_cache.version()
+price_intervals.get()
+comparables.get()
+# The registry warms the model up (and checks the compiled path) when it loads
+model_registry.current()
+# Compressed copies of the layout and market figures, shared by the workers
+response_compressor.warm(server, ['/_dash-layout'] + [f'/api/figures/{name}' for name in figure_cache.names()])
+
+# Memory of whichever worker answers GET /api/stats
+register_stats(server, 'memory', process_memory)